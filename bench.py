@@ -0,0 +1,460 @@
+#!/usr/bin/env python
+
+"""Benchmark internals of Xsocius."""
+
+# IMPORTANT USAGE INFO:
+#
+# This is a developer tool, and isn't part of the built application. It times the hot paths
+# of puzzle loading, saving and solving, usually against the older way of doing the same thing,
+# so we can see that an optimization is actually worth it.
+#
+#   ./bench.py             runs all benchmarks
+#   ./bench.py cksum       runs just the named benchmarks
+#
+# Puzzles are generated on the fly, so no puzzle files are needed.
+
+import random
+import struct
+import argparse
+import timeit
+import itertools
+from collections import OrderedDict
+
+from xsocius import acrosslite
+from xsocius.puzzle import Puzzle, FAST_UNLOCK, py_gui_unlock
+
+if FAST_UNLOCK:
+    from xsocius.unlocker import gui_unlock
+
+
+def make_puzzle(width, height, seed=0):
+    """Make a random, half-filled acrosslite.Puzzle of the given size."""
+
+    rand = random.Random(seed)
+
+    solution = "".join(
+        "." if rand.random() < 0.16 else rand.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        for i in range(width * height))
+
+    puz = acrosslite.Puzzle()
+    puz.width = width
+    puz.height = height
+    puz.solution = solution
+    puz.fill = "".join(
+        c if c == "." or rand.random() < 0.5 else "-" for c in solution)
+    puz.title = "Benchmark %sx%s" % (width, height)
+    puz.author = "Xsocius"
+    puz.copyright = "Public domain"
+
+    numbering = acrosslite.DefaultClueNumbering(solution, [""] * len(solution),
+                                                width, height)
+    puz.clues = ["Clue number %s, which is about this long" % i
+                 for i in range(len(numbering.across) + len(numbering.down))]
+
+    return puz
+
+
+def make_model(width, height, seed=0):
+    """Make a xsocius.puzzle.Puzzle, ready to solve, from make_puzzle."""
+
+    puzzle = Puzzle()
+    puzzle._setup(make_puzzle(width, height, seed))
+    puzzle.initPuzzleCursor()
+    return puzzle
+
+
+def timed(func, number):
+    """Return average seconds per call of func."""
+
+    return timeit.timeit(func, number=number) / number
+
+
+def report(label, seconds, baseline=None):
+    """Print timing, with speedup over baseline if given."""
+
+    line = "  %-40s %10.1f usec" % (label, seconds * 1e6)
+    if baseline:
+        line += "  (%.1fx)" % (baseline / seconds)
+    print(line)
+
+
+# Checksums as acrosslite.Puzzle computed them before memoizing, where every call
+# recomputed every part; these are the baseline for bench_cksum.
+
+
+def unmemoized_header_cksum(puz, cksum=0):
+    return acrosslite.data_cksum(
+        struct.pack(acrosslite.HEADER_CKSUM_FORMAT,
+                    puz.width,
+                    puz.height,
+                    len(puz.clues),
+                    puz.puzzletype,
+                    puz.solution_state),
+        cksum)
+
+
+def unmemoized_text_cksum(puz, cksum=0):
+    data_cksum = acrosslite.data_cksum
+
+    if puz.title:
+        cksum = data_cksum(puz.title + '\0', cksum)
+    if puz.author:
+        cksum = data_cksum(puz.author + '\0', cksum)
+    if puz.copyright:
+        cksum = data_cksum(puz.copyright + '\0', cksum)
+
+    for clue in puz.clues:
+        if clue:
+            cksum = data_cksum(clue, cksum)
+
+    if puz.version == '1.3' and puz.notes:
+        cksum = data_cksum(puz.notes + '\0', cksum)
+
+    return cksum
+
+
+def unmemoized_global_cksum(puz):
+    cksum = unmemoized_header_cksum(puz)
+    cksum = acrosslite.data_cksum(puz.solution, cksum)
+    cksum = acrosslite.data_cksum(puz.fill, cksum)
+    return unmemoized_text_cksum(puz, cksum)
+
+
+def unmemoized_magic_cksum(puz):
+    cksums = [
+        unmemoized_header_cksum(puz),
+        acrosslite.data_cksum(puz.solution),
+        acrosslite.data_cksum(puz.fill),
+        unmemoized_text_cksum(puz)
+    ]
+
+    mask = acrosslite.MASKSTRING
+    cksum_magic = 0
+    for (i, cksum) in enumerate(reversed(cksums)):
+        cksum_magic <<= 8
+        cksum_magic |= (mask[len(cksums) - i - 1] ^ (cksum & 0x00ff))
+        cksum_magic |= (mask[len(cksums) - i - 1 + 4] ^ (cksum >> 8)) << 32
+
+    return cksum_magic
+
+
+# ------------------------------------------------------------------ BENCHMARKS
+
+
+def bench_cksum():
+    """Checksums computed on save, before and after memoizing."""
+
+    for size in (15, 21):
+        puz = make_puzzle(size, size)
+        fill = list(puz.fill)
+
+        def save_cksums():
+            puz.global_cksum()
+            puz.header_cksum()
+            puz.magic_cksum()
+
+        def unmemoized():
+            unmemoized_global_cksum(puz)
+            unmemoized_header_cksum(puz)
+            unmemoized_magic_cksum(puz)
+
+        # Same answers, or the comparison means nothing
+        assert unmemoized_global_cksum(puz) == puz.global_cksum()
+        assert unmemoized_header_cksum(puz) == puz.header_cksum()
+        assert unmemoized_magic_cksum(puz) == puz.magic_cksum()
+
+        def one_letter_changed():
+            # Typical save: one letter typed since last time
+            fill[0] = "A" if fill[0] != "A" else "B"
+            puz.fill = "".join(fill)
+            save_cksums()
+
+        print("%sx%s save checksums:" % (size, size))
+        base = timed(unmemoized, 200)
+        report("recomputed every time", base)
+        report("memoized, one letter changed", timed(one_letter_changed, 200), base)
+        report("memoized, unchanged", timed(save_cksums, 200), base)
+
+
+def bench_data_cksum():
+    """Compiled data_cksum against the pure-Python one."""
+
+    rand = random.Random(0)
+    samples = [bytes(rand.randrange(256) for i in range(n)) for n in (0, 1, 225, 441, 4000)]
+    samples += [s.decode('ISO-8859-1') for s in samples]
+
+    # Results must be bit-identical, whatever the seed
+    for data in samples:
+        for seed in (0, 1, 0x8000, 0xffff):
+            assert acrosslite.data_cksum(data, seed) == acrosslite.py_data_cksum(data, seed)
+
+    if not acrosslite.FAST_CKSUM:
+        print("  compiled checksummer not built (./setup.py build_ext); nothing to compare")
+        return
+
+    for n in (225, 441, 4000):
+        data = bytes(rand.randrange(256) for i in range(n))
+        print("%s bytes:" % n)
+        base = timed(lambda: acrosslite.py_data_cksum(data), 500)
+        report("python", base)
+        report("compiled", timed(lambda: acrosslite.data_cksum(data), 500), base)
+
+
+def bench_keystroke():
+    """Typing a letter, as the grid grows, with correct/filled counts kept."""
+
+    for size in (15, 21, 35, 50):
+        puzzle = make_model(size, size)
+        cells = [cell for row in puzzle.grid for cell in row if not cell.black]
+
+        # Worst case for the old check: everything correct but one cell
+        for cell in cells[:-1]:
+            cell.response = cell.answer
+        puzzle.count_cells()
+
+        letters = itertools.cycle("AB")
+
+        def keystroke():
+            puzzle.setResponse(cells[-1], next(letters))
+
+        def keystroke_full_scan():
+            # Before counting, every change checked every cell
+            puzzle.setResponse(cells[-1], next(letters))
+            all(cell.is_correct() for row in puzzle.grid for cell in row)
+
+        print("%sx%s:" % (size, size))
+        base = timed(keystroke_full_scan, 500)
+        report("keystroke, full-grid check", base)
+        report("keystroke, counted", timed(keystroke, 500), base)
+
+
+def bench_locked():
+    """Solved-check of a locked puzzle, against building and squaring the fill."""
+
+    for size in (15, 21):
+        puzzle = make_model(size, size)
+        pfile = puzzle.pfile
+        pfile.solution_state = acrosslite.SolutionState.Locked
+        pfile.scrambled_cksum = acrosslite.scrambled_cksum(pfile.solution, size, size)
+
+        def old_check():
+            # Before keeping a fill buffer, every change did this
+            fill = ""
+            for y in range(puzzle.height):
+                for x in range(puzzle.width):
+                    cell = puzzle.grid[x][y]
+                    if cell.black:
+                        fill += "."
+                    elif not cell.response:
+                        fill += "-"
+                    else:
+                        fill += cell.response
+            return pfile.check_answers(fill)
+
+        print("%sx%s, half filled:" % (size, size))
+        base = timed(old_check, 200)
+        report("build fill and scrambled checksum", base)
+        report("filled count", timed(puzzle.is_puzzle_correct, 200), base)
+
+        cells = [cell for row in puzzle.grid for cell in row if not cell.black]
+        for cell in cells:
+            cell.response = cell.answer
+        puzzle.count_cells()
+
+        print("%sx%s, all filled:" % (size, size))
+        base = timed(old_check, 200)
+        report("build fill and scrambled checksum", base)
+        report("checksum of fill buffer", timed(puzzle.is_puzzle_correct, 200), base)
+
+
+def bench_grid_ops():
+    """Whole-grid check and save, against walking every cell."""
+
+    for size in (21, 50):
+        puzzle = make_model(size, size)
+        puzzle.timer_time, puzzle.timer_running = 0, False
+
+        def old_check():
+            # Before working on the planes, check asked every cell
+            for col in puzzle.grid:
+                for cell in col:
+                    if cell.response and not cell.is_correct():
+                        cell.checked = True
+
+        def old_update_pfile():
+            # Before working on the planes, this built the fill cell by cell
+            fill = ""
+            mkup = []
+            for y in range(puzzle.height):
+                for x in range(puzzle.width):
+                    cell = puzzle.grid[x][y]
+                    if cell.black:
+                        fill += "."
+                    elif not cell.response:
+                        fill += "-"
+                    else:
+                        fill += cell.response
+                    mkup.append(cell.markup())
+            puzzle.pfile.fill = fill
+            puzzle.pfile.markup().markup = mkup
+
+        print("%sx%s, half filled:" % (size, size))
+        base = timed(old_check, 100)
+        report("check puzzle, cell by cell", base)
+        report("check puzzle, planes", timed(puzzle.check_puzzle, 100), base)
+        base = timed(old_update_pfile, 100)
+        report("update pfile, cell by cell", base)
+        report("update pfile, planes", timed(puzzle.update_pfile, 100), base)
+
+
+def bench_nav():
+    """Cursor movement with lookup tables, against scanning the grid."""
+
+    for size in (21, 50):
+        puzzle = make_model(size, size)
+        cells = [cell for col in puzzle.grid for cell in col if not cell.black]
+
+        def old_move(cell, dx, skip_filled):
+            # Before navigation tables, move scanned the row cell by cell
+            x = cell.x + dx
+            while 0 <= x < puzzle.width:
+                other = puzzle.grid[x][cell.y]
+                if not other.black and (not skip_filled or not other.response):
+                    return other
+                x += dx
+            return cell
+
+        def old_next_word(cell):
+            x = cell.x
+            while x < puzzle.width and not puzzle.grid[x][cell.y].black:
+                x += 1
+            while x < puzzle.width and puzzle.grid[x][cell.y].black:
+                x += 1
+            if x == puzzle.width:
+                return cell
+            return puzzle.grid[x][cell.y]
+
+        print("%sx%s, half filled, from every white cell:" % (size, size))
+        for skip_filled in (False, True):
+            label = "move right%s" % (", skipping filled" if skip_filled else "")
+            base = timed(lambda: [old_move(c, 1, skip_filled) for c in cells], 20)
+            report(label + ", scanning", base)
+            report(label + ", tables", timed(
+                lambda: [puzzle.move(c, 1, 0, False, skip_filled) for c in cells],
+                20), base)
+        base = timed(lambda: [old_next_word(c) for c in cells], 20)
+        report("next word, scanning", base)
+        report("next word, tables", timed(
+            lambda: [puzzle.next_word(c, 1, 0) for c in cells], 20), base)
+
+
+def bench_numbering():
+    """Clue numbering and loading, against rescanning for each word."""
+
+    def old_numbering(grid, width, height):
+        # Before run-length passes, numbering measured each word from its
+        # start, twice
+        def len_across(i):
+            for c in range(0, width - i % width):
+                if grid[i + c] == ".":
+                    return c
+            return c + 1
+
+        def len_down(i):
+            for c in range(0, height - i // width):
+                if grid[i + c * width] == ".":
+                    return c
+            return c + 1
+
+        across, down = [], []
+        for i in range(len(grid)):
+            if grid[i] == ".":
+                continue
+            if (i % width == 0 or grid[i - 1] == ".") and len_across(i) > 1:
+                across.append((i, len_across(i)))
+            if (i < width or grid[i - width] == ".") and len_down(i) > 1:
+                down.append((i, len_down(i)))
+        return across, down
+
+    for size in (15, 100):
+        pfile = make_puzzle(size, size)
+
+        def new_numbering():
+            pfile.helpers.pop('clues', None)
+            pfile.clue_numbering()
+
+        print("%sx%s:" % (size, size))
+        base = timed(lambda: old_numbering(pfile.solution, size, size), 10)
+        report("number clues, rescanning", base)
+        report("number clues, run-length", timed(new_numbering, 10), base)
+        report("set up puzzle", timed(lambda: Puzzle()._setup(pfile), 10))
+
+
+def bench_unlock():
+    """Python and compiled unlockers from 3x3 to 60x60, checked against acrosslite."""
+
+    if not FAST_UNLOCK:
+        print("  compiled unlocker not built (./setup.py build_ext); only timing Python one")
+
+    unlockers = [("python", py_gui_unlock)]
+    if FAST_UNLOCK:
+        unlockers.append(("compiled", gui_unlock))
+
+    rand = random.Random(0)
+
+    for size in (3, 5, 10, 15, 21, 25, 31, 32, 40, 50, 60):
+        solution = "".join(
+            "." if rand.random() < 0.16 else rand.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+            for i in range(size * size))
+        key = rand.randrange(1000, 10000)
+        scrambled = acrosslite.scramble_solution(solution, size, size, key)
+        cksum = acrosslite.scrambled_cksum(solution, size, size)
+
+        # A few letters filled in, as in a puzzle that's been started
+        fill = "".join(c if rand.random() < 0.1 else "-" for c in solution)
+
+        # The first key down from 9999 whose checksum matches wins; it's usually the key
+        # it was locked with, but with only a 16-bit checksum, small grids can collide.
+        # Filled-in letters only prune keys that can't be right.
+        for name, unlock in unlockers:
+            for known in (None, fill.encode('ISO-8859-1')):
+                out, found, pruned = unlock(
+                    size, size, scrambled.encode('ISO-8859-1'), cksum, known)
+                assert found >= key
+                assert out.decode('ISO-8859-1') == acrosslite.unscramble_solution(
+                    scrambled, size, size, found)
+                assert found != key or out.decode('ISO-8859-1') == solution
+                assert pruned <= 9999 - found
+
+        print("%sx%s, key %s:" % (size, size, key))
+        base = timed(lambda: acrosslite.unscramble_solution(scrambled, size, size, key), 20)
+        report("acrosslite, one key", base)
+        for name, unlock in unlockers:
+            report("%s, search to key" % name, timed(
+                lambda: unlock(size, size, scrambled.encode('ISO-8859-1'), cksum), 5))
+            report("%s, search to key, partly filled" % name, timed(
+                lambda: unlock(size, size, scrambled.encode('ISO-8859-1'), cksum,
+                               fill.encode('ISO-8859-1')), 5))
+
+
+BENCHMARKS = OrderedDict([
+    ('cksum', bench_cksum),
+    ('data_cksum', bench_data_cksum),
+    ('keystroke', bench_keystroke),
+    ('locked', bench_locked),
+    ('grid_ops', bench_grid_ops),
+    ('nav', bench_nav),
+    ('numbering', bench_numbering),
+    ('unlock', bench_unlock),
+])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Xsocius internals.")
+    parser.add_argument("names", metavar="benchmark", nargs="*",
+                        help="Benchmarks to run (defaults to all)", default=list(BENCHMARKS))
+    args = parser.parse_args()
+
+    for name in args.names:
+        assert name in BENCHMARKS, "Not benchmark: %s" % name
+        print("\n== %s: %s\n" % (name, BENCHMARKS[name].__doc__))
+        BENCHMARKS[name]()
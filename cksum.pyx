@@ -0,0 +1,30 @@
+# Checksum code; makes a much faster c-based version of acrosslite.data_cksum.
+#
+# This needs to be build using ./setup build_ext
+#
+# Results must stay bit-identical to the Python version in acrosslite.py; bench.py checks this.
+
+cpdef unsigned short data_cksum(data, unsigned short cksum=0):
+    cdef bytes buf
+    cdef unsigned char*s
+    cdef Py_ssize_t i
+    cdef Py_ssize_t n
+    cdef unsigned int c = cksum
+
+    if type(data) is str:
+        buf = data.encode()
+    elif type(data) is bytes:
+        buf = data
+    else:
+        # bytearray, memoryview, list of ints, etc.
+        buf = bytes(data)
+
+    s = <unsigned char*> buf
+    n = len(buf)
+
+    for i in range(n):
+        # right-shift one with wrap-around, then add in the data and clear any carried bit
+        # past 16
+        c = (((c >> 1) | ((c & 0x0001) << 15)) + s[i]) & 0xffff
+
+    return c
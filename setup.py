@@ -12,7 +12,7 @@
 #
 # This bypasses that if used directly.
 #
-# Note: this is also used as "setup build_ext" to build cython-based unlocker.
+# Note: this is also used as "setup build_ext" to build cython-based unlocker and checksummer.
 
 import sys
 import glob
@@ -195,7 +195,9 @@ def build_linux():
     settings.update(
         packages=find_packages(exclude=['ez_setup', 'examples', 'tests']),
         zip_safe=False,
-        entry_points={'gui_scripts': ['%s = xsocius.run:run' % NAME.lower(), ]},
+        entry_points={'gui_scripts': ['%s = xsocius.run:run' % NAME.lower(), ],
+                      'console_scripts': [
+                          '%s-validate = xsocius.validate:main' % NAME.lower(), ]},
         data_files=[],
         package_data={'xsocius': PACKAGE_FILES},
     )
@@ -266,8 +268,21 @@ Name: "{group}\Uninstall %(NAME)s"; Filename: "{uninstallexe}"
 def build_unlocker():
     from Cython.Distutils import build_ext
     print("\n\nIMPORTANT: "
-          "This doesn't build all of this program, just the unlocker.\n\n")
-    ext_modules = [Extension("unlocker", ["unlocker.pyx"])]
+          "This doesn't build all of this program, just the unlocker and checksummer.\n\n")
+
+    # The unlocker tries keys on all cores with OpenMP. Set NO_OPENMP for a compiler without
+    # it (like Apple's clang); it still works, one key at a time.
+    if os.environ.get('NO_OPENMP'):
+        openmp = []
+    elif sys.platform == 'win32':
+        openmp = ['/openmp']
+    else:
+        openmp = ['-fopenmp']
+
+    ext_modules = [Extension("unlocker", ["unlocker.pyx"],
+                             extra_compile_args=openmp,
+                             extra_link_args=openmp),
+                   Extension("cksum", ["cksum.pyx"])]
 
     setup(
         name='Xsocius Unlocker',
@@ -275,8 +290,9 @@ def build_unlocker():
         ext_modules=ext_modules
     )
 
-    shutil.move('build/lib.macosx-10.10-x86_64-3.5/unlocker.so',
-                'xsocius/unlocker.so')
+    for ext in ext_modules:
+        shutil.move('build/lib.macosx-10.10-x86_64-3.5/%s.so' % ext.name,
+                    'xsocius/%s.so' % ext.name)
 
 # ---------------------------------- RUNNER ------------------------------------
 
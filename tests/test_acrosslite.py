@@ -0,0 +1,41 @@
+"""Tests for reading Across Lite files (see xsocius.acrosslite)."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from xsocius import acrosslite
+
+
+class BadFileTestCase(unittest.TestCase):
+    """Files that aren't puzzles fail as such, not with other errors."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "bad.puz")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def assertNotPuzzle(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+        with self.assertRaises(acrosslite.PuzzleFormatError):
+            acrosslite.read(self.path)
+        with open(self.path, 'rb') as f:
+            with self.assertRaises(acrosslite.PuzzleFormatError):
+                acrosslite.read(f)
+        with self.assertRaises(acrosslite.PuzzleFormatError):
+            acrosslite.parse(data)
+
+    def test_empty(self):
+        self.assertNotPuzzle(b'')
+
+    def test_truncated_header(self):
+        self.assertNotPuzzle(b'\0\0ACROSS&DOWN\0' + b'\0' * 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Tests for journal of unsaved changes (see xsocius.journal)."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from xsocius import acrosslite
+from xsocius.puzzle import Puzzle
+from xsocius.saver import SaveWorker
+
+
+def make_rebus_puzzle(path):
+    """Save 3x3 puzzle with rebus HEART in top-left, filled in wrong."""
+
+    solution = "HAT" "A.A" "TAX"
+
+    pfile = acrosslite.Puzzle()
+    pfile.width = pfile.height = 3
+    pfile.solution = solution
+    pfile.fill = "XA-" "-.-" "---"
+    pfile.title = "Rebus"
+    numbering = acrosslite.DefaultClueNumbering(solution, [""] * 9, 3, 3)
+    pfile.clues = ["Clue %s" % i for i in range(
+        len(numbering.across) + len(numbering.down))]
+
+    pfile.extensions[acrosslite.Extensions.Rebus] = b"\1" + b"\0" * 8
+    pfile.extensions[acrosslite.Extensions.RebusSolutions] = b" 0:HEART;"
+    pfile.extensions[acrosslite.Extensions.RebusFill] = b"0:XOXO;"
+    pfile.save(path)
+
+
+def open_puzzle(path):
+    """Return puzzle at path, ready to solve (recovering any journal)."""
+
+    puzzle = Puzzle()
+    puzzle.load(path, verify=acrosslite.Verify.Skip)
+    puzzle.initPuzzleCursor()
+    return puzzle
+
+
+class JournalRebusTestCase(unittest.TestCase):
+    """Rebus responses are bytes when read from file, str when typed."""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "rebus.puz")
+        make_rebus_puzzle(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_reveal_and_recover(self):
+        puzzle = open_puzzle(self.path)
+        cell = puzzle.grid[0][0]
+        self.assertEqual(cell.rebus_response, b"XOXO")
+
+        self.assertTrue(puzzle.reveal_incorrect())
+        self.assertEqual(cell.rebus_response, b"HEART")
+        puzzle.journal.close()
+
+        # Crashed without saving; changes come back, as if read from file
+        recovered = open_puzzle(self.path)
+        cell = recovered.grid[0][0]
+        self.assertTrue(recovered.dirty)
+        self.assertEqual(cell.response, "H")
+        self.assertEqual(cell.rebus_response, b"HEART")
+        self.assertTrue(cell.revealed)
+        self.assertTrue(cell.is_correct())
+
+    def test_type_over_loaded_rebus(self):
+        puzzle = open_puzzle(self.path)
+        cell = puzzle.grid[0][0]
+        puzzle.setResponse(cell, "Q")
+        puzzle.journal.close()
+
+        recovered = open_puzzle(self.path)
+        self.assertEqual(recovered.grid[0][0].response, "Q")
+        self.assertEqual(recovered.grid[0][0].rebus_response, b"XOXO")
+
+    def test_close_keeps_journal(self):
+        puzzle = open_puzzle(self.path)
+        puzzle.setResponse(puzzle.grid[2][0], "T")
+        puzzle.close(keep_journal=True)
+        self.assertEqual(open_puzzle(self.path).grid[2][0].response, "T")
+
+        open_puzzle(self.path).close()
+        self.assertEqual(open_puzzle(self.path).grid[2][0].response, "")
+
+    def test_failed_save_keeps_journal(self):
+        puzzle = open_puzzle(self.path)
+        puzzle.setResponse(puzzle.grid[2][0], "T")
+
+        # Something in the way of saving
+        os.remove(self.path)
+        os.mkdir(self.path)
+
+        # (The window keeps the timer)
+        puzzle.timer_time = 0
+        puzzle.timer_running = False
+
+        worker = SaveWorker()
+        worker.start()
+        results = []
+        puzzle.save_puzzle(worker=worker,
+                           done=lambda snapshot, error: results.append((snapshot, error)))
+        worker.stop()
+
+        snapshot, error = results[0]
+        self.assertIsNotNone(error)
+        self.assertTrue(puzzle.save_failed)
+        puzzle.saved(snapshot, puzzle.path, error)
+        self.assertTrue(puzzle.dirty)
+        puzzle.close(keep_journal=puzzle.save_failed)
+        self.assertTrue(os.path.exists(puzzle.journal.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
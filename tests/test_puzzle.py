@@ -0,0 +1,98 @@
+"""Tests for solving a puzzle (see xsocius.puzzle)."""
+
+import unittest
+
+from xsocius import acrosslite
+from xsocius.puzzle import Puzzle
+
+
+def make_puzzle():
+    """Return empty 3x3 puzzle, ready to solve, with cursor at top-left."""
+
+    solution = "CAT" "A.A" "TAX"
+
+    pfile = acrosslite.Puzzle()
+    pfile.width = pfile.height = 3
+    pfile.solution = solution
+    pfile.fill = "---" "-.-" "---"
+    pfile.title = "Test"
+    numbering = acrosslite.DefaultClueNumbering(solution, [""] * 9, 3, 3)
+    pfile.clues = ["Clue %s" % i for i in range(
+        len(numbering.across) + len(numbering.down))]
+
+    puzzle = Puzzle()
+    puzzle._setup(pfile)
+    puzzle.initPuzzleCursor()
+    return puzzle
+
+
+class ResponseTestCase(unittest.TestCase):
+    """Cells only take one letter or digit, however it arrives."""
+
+    def setUp(self):
+        self.puzzle = make_puzzle()
+
+    def test_set_response(self):
+        cell = self.puzzle.grid[0][0]
+        self.puzzle.setResponse(cell, "c")
+        self.assertEqual(cell.response, "C")
+
+    def test_receive_bad_response(self):
+        # As a partner's SET arrives
+        cell = self.puzzle.grid[0][0]
+        self.puzzle.setResponse(cell, "C", noecho=True)
+
+        for response in ("Ω", "AB", "ß", "-"):
+            self.puzzle.setResponse(cell, response, noecho=True)
+            self.assertEqual(cell.response, "C")
+
+        # Nothing half-done left over for the next step
+        self.assertEqual(self.puzzle.changes, {})
+        self.puzzle.doUndo()
+        self.assertEqual(cell.response, "")
+        self.assertFalse(self.puzzle.undo.can_undo())
+
+    def test_paste(self):
+        self.puzzle.fill_curr_word("cΩa☃t")
+        self.assertEqual(self.puzzle.curr_word_text(), "CAT")
+
+        # All one step
+        self.puzzle.doUndo()
+        self.assertEqual(self.puzzle.curr_word_text(), "???")
+        self.assertFalse(self.puzzle.undo.can_undo())
+
+    def test_paste_nothing_usable(self):
+        self.puzzle.fill_curr_word("ΩΩ")
+        self.assertEqual(self.puzzle.curr_word_text(), "???")
+        self.assertEqual(self.puzzle.changes, {})
+
+
+class UndoTestCase(unittest.TestCase):
+    """Undo steps are only made for changes to cells."""
+
+    def setUp(self):
+        self.puzzle = make_puzzle()
+
+    def test_undo_after_nothing_changed(self):
+        puzzle = self.puzzle
+        cell = puzzle.grid[0][0]
+        puzzle.setResponse(cell, "C")
+
+        # Nothing wrong to check, and the same letter typed again
+        self.assertFalse(puzzle.check_puzzle())
+        self.assertFalse(puzzle.check_word())
+        puzzle.setResponse(cell, "C")
+        puzzle.add_undo()
+
+        # So undo goes straight back to before the letter was typed
+        puzzle.doUndo()
+        self.assertEqual(cell.response, "")
+        self.assertFalse(puzzle.undo.can_undo())
+
+        puzzle.doRedo()
+        self.assertEqual(cell.response, "C")
+        self.assertFalse(puzzle.undo.can_redo())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,159 +1,321 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+#
 # Unlocker code; makes a much faster c-based version than the standard Python version.
 #
 # This needs to be build using ./setup build_ext
+#
+# Keys are tried in parallel across all cores with OpenMP (see build_unlocker in setup.py;
+# built without it, they're tried one at a time). Trying a key doesn't touch Python
+# objects or allocate: each thread unscrambles into its own scratch buffers.
+#
+# All buffers are sized from the puzzle, so grids of any size work; results must match
+# acrosslite.unscramble_solution, and bench.py checks this from 3x3 to 60x60.
+#
+# If some letters are already known (filled in), a key is first checked against a few of
+# them, which only means following those letters back through the four rounds; most keys
+# are thrown out this way without unscrambling anything.
+
+from cython.parallel cimport parallel, prange
+from libc.stdlib cimport malloc, free
+
+# Most known letters to check a key against before unscrambling with it; each wrong key
+# gets past one with a 1 in 26 chance.
 
-cpdef gui_unlock(char width,
-                 char height,
+cdef enum:
+    SAMPLES = 4
+
+# The best key found so far is shared by all threads, so it's read and written
+# atomically (without OpenMP there's just the one thread).
+
+cdef extern from *:
+    """
+    static int read_best(const int *best) {
+        int key;
+    #ifdef _OPENMP
+        #pragma omp atomic read
+    #endif
+        key = *best;
+        return key;
+    }
+
+    static void write_best(int *best, int key) {
+    #ifdef _OPENMP
+        #pragma omp atomic write
+    #endif
+        *best = key;
+    }
+    """
+    int read_best(const int*best) noexcept nogil
+    void write_best(int*best, int key) noexcept nogil
+
+
+cpdef gui_unlock(Py_ssize_t width,
+                 Py_ssize_t height,
                  bytes solution,
-                 unsigned short scrambled_cksum):
-    cdef unsigned short key
+                 unsigned short scrambled_cksum,
+                 bytes fill=None):
+    """Find key for locked solution; return (unscrambled solution, key, # keys pruned).
+
+    fill, if given, is laid out like solution, with a letter for each square known to
+    be right (anything else is unknown). Keys which don't give those letters are pruned
+    without unscrambling; the count is of pruned keys above the key found. If the fill
+    turns out to be wrong and nothing is found, all keys are tried again without it.
+
+    If no key works, returns (False, 1000, # keys pruned).
+    """
+
     cdef bytes sq
     cdef bytes sqr
-    cdef char*solin = solution
-    cdef bytes out
+    cdef list sample
+    cdef Py_ssize_t j
+    cdef Py_ssize_t spots[SAMPLES]
+    cdef unsigned char want[SAMPLES]
+    cdef int nspots = 0
+    cdef int i
+    cdef int found
+    cdef int pruned
+    cdef bytearray out
+
+    if width < 0 or height < 0 or len(solution) != width * height:
+        raise ValueError("Solution isn't %sx%s" % (width, height))
+    if fill is not None and len(fill) != width * height:
+        raise ValueError("Fill isn't %sx%s" % (width, height))
 
-    sq = square(solin, width, height)
+    sq = square(solution, width, height)
     sqr = sq.replace(b'.', b'')
 
-    # people often use keys >7000, so let's sneakily count down
-    for key in range(9999, 999, -1):
-        out = try_key(width, height, scrambled_cksum, sq, sqr, key)
-        if out:
-            return (out, key)
-    return (False, key)
-
-cdef bytes try_key(char width,
-                   char height,
-                   unsigned short scrambled_cksum,
-                   bytes sq,
-                   bytes sqr,
-                   unsigned short key):
-    cdef unsigned short cksum = 0
-    cdef char b
-    cdef unsigned short lowbit
-    cdef str c
-    cdef bytes uncrambled
-    cdef bytes sqd
-    cdef char*sqdc
-
-    unscrambled = square(
-        restore(sq, unscramble_string(sqr, key)),
-        height,
-        width)
-    sqd = square(unscrambled, width, height).replace(b'.', b'')
-    sqdc = sqd
-
-    for b in sqdc:
-        # right-shift one with wrap-around
-        lowbit = (cksum & 0x0001)
-        cksum = (cksum >> 1)
-        if lowbit: cksum = (cksum | 0x8000)
-
-        # then add in the data and clear any carried bit past 16
-        cksum = (cksum + b) & 0xffff
-    if cksum == scrambled_cksum:
-        return unscrambled
-
-cdef inline bytes nodots(char*datain):
-    cdef char[1000] data
-    cdef short i
-    cdef short j = 0
-    for i in range(len(datain)):
-        data[j] = datain[i]
-        if datain[i] != 46:  # dot
+    if fill is not None:
+        # Known letters, by their place among the letters of sqr
+        sample = []
+        j = 0
+        for s, c in zip(sq, square(fill, width, height)):
+            if s != 46:  # .
+                if 65 <= c <= 90:
+                    sample.append((j, c))
+                j += 1
+        nspots = min(len(sample), SAMPLES)
+        for i in range(nspots):
+            spots[i], want[i] = sample[i * len(sample) // nspots]
+
+    found, pruned = search(sqr, scrambled_cksum, spots, want, nspots)
+    if not found and nspots:
+        found, _ = search(sqr, scrambled_cksum, spots, want, 0)
+    if not found:
+        return (False, 1000, pruned)
+
+    out = bytearray(len(sqr) + 1)
+    try_key(sqr, len(sqr), found, out, bytearray(len(sqr) + 1))
+    return (square(restore(sq, bytes(out[:len(sqr)])), height, width), found, pruned)
+
+cdef tuple search(bytes sqr,
+                  unsigned short scrambled_cksum,
+                  const Py_ssize_t*spots,
+                  const unsigned char*want,
+                  int nspots):
+    """Return (highest key with checksum, or 0; # keys above it pruned by known letters)."""
+
+    cdef const unsigned char*letters = sqr
+    cdef Py_ssize_t n = len(sqr)
+    cdef int i
+    cdef int key
+    cdef int pruned = 0
+    cdef int found = 0
+    cdef int*best = &found
+    cdef int failed = 0
+    cdef int*nomem = &failed
+    cdef unsigned char*a
+    cdef unsigned char*b
+    cdef bytearray rejected = bytearray(9000)
+    cdef unsigned char*reject = rejected
+
+    # people often use keys >7000, so let's sneakily count down. Keys are handed out to
+    # threads in that order, and once one matches, lower keys are skipped; a higher one
+    # is still tried, so we find the same key as if we'd gone one at a time. A thread may
+    # see a stale best, but that only means trying a key it could have skipped.
+    with nogil, parallel():
+        a = <unsigned char*> malloc(n + 1)
+        b = <unsigned char*> malloc(n + 1)
+
+        for i in prange(9000, schedule='dynamic', chunksize=16):
+            key = 9999 - i
+            if a == NULL or b == NULL:
+                nomem[0] = 1
+            elif key <= read_best(best):
+                pass
+            elif not fits(letters, n, key, spots, want, nspots):
+                reject[i] = 1
+            elif try_key(letters, n, key, a, b) == scrambled_cksum:
+                with gil:
+                    if key > read_best(best):
+                        write_best(best, key)
+
+        free(a)
+        free(b)
+
+    if failed:
+        raise MemoryError()
+
+    # Count only keys we'd have got to one at a time, so it's the same however the
+    # threads ran
+    for i in range(9000):
+        if reject[i] and 9999 - i > found:
+            pruned += 1
+
+    return (found, pruned)
+
+cdef bint fits(const unsigned char*letters,
+               Py_ssize_t n,
+               int key,
+               const Py_ssize_t*spots,
+               const unsigned char*want,
+               int nspots) noexcept nogil:
+    """Would unscrambling letters with key give the wanted letter at each of spots?
+
+    This follows each spot back through the rounds of try_key, last first, to the
+    scrambled letter it comes from, adding up its unshifts on the way.
+    """
+
+    cdef int[4] digits
+    cdef int r
+    cdef int s
+    cdef int c
+    cdef int shift
+    cdef Py_ssize_t i
+    cdef Py_ssize_t j
+    cdef Py_ssize_t half = n // 2
+    cdef Py_ssize_t start
+
+    digits[0] = key // 1000
+    digits[1] = key // 100 % 10
+    digits[2] = key // 10 % 10
+    digits[3] = key % 10
+
+    for s in range(nspots):
+        i = spots[s]
+        shift = 0
+        for r in range(4):
+            shift += digits[i % 4]
+
+            # undo cut (see try_key)
+            start = n - digits[r]
+            if start < 0:
+                start += n
+            if start < 0:
+                start = 0
+            j = start + i
+            if j >= n:
+                j -= n
+
+            # and unshuffle
+            if j < half:
+                i = 2 * j + 1
+            else:
+                i = 2 * (j - half)
+
+        c = (letters[i] - 65 - shift) % 26
+        if c < 0:
+            c += 26
+        if c + 65 != want[s]:
+            return False
+
+    return True
+
+cdef unsigned short try_key(const unsigned char*letters,
+                            Py_ssize_t n,
+                            int key,
+                            unsigned char*a,
+                            unsigned char*b) noexcept nogil:
+    """Unscramble letters with key into a, using b as scratch; return checksum.
+
+    This is acrosslite.unscramble_string: for each digit of the key, last first,
+    unshuffle, cut the deck at the digit, and unshift by the key. The checksum of the
+    unscrambled letters is the puzzle's scrambled checksum if the key is right.
+    """
+
+    cdef int[4] digits
+    cdef int r
+    cdef int d
+    cdef int c
+    cdef Py_ssize_t i
+    cdef Py_ssize_t j
+    cdef Py_ssize_t half = n // 2
+    cdef Py_ssize_t start
+    cdef const unsigned char*src = letters
+    cdef unsigned int cksum = 0
+
+    digits[0] = key // 1000
+    digits[1] = key // 100 % 10
+    digits[2] = key // 10 % 10
+    digits[3] = key % 10
+
+    for r in range(3, -1, -1):
+        # unshuffle: s[1::2] + s[::2]
+        for i in range(half):
+            b[i] = src[2 * i + 1]
+        for i in range(n - half):
+            b[half + i] = src[2 * i]
+
+        # cut: s[n - d:] + s[:n - d], with Python's slicing when the digit is bigger than n
+        start = n - digits[r]
+        if start < 0:
+            start += n
+        if start < 0:
+            start = 0
+
+        # and unshift each letter by its digit of the key
+        j = start
+        for i in range(n):
+            if j == n:
+                j = 0
+            c = (b[j] - 65 - digits[i % 4]) % 26
+            if c < 0:
+                c += 26
+            a[i] = c + 65
             j += 1
-    data[j] = 0
-    return data
 
-cdef inline bytes square(bytes data,
-                         char w,
-                         char h):
+        src = a
+
+    for i in range(n):
+        # right-shift one with wrap-around, then add in the data and clear any carried bit
+        # past 16
+        cksum = (((cksum >> 1) | ((cksum & 0x0001) << 15)) + a[i]) & 0xffff
+
+    return cksum
+
+cdef bytes square(bytes data,
+                  Py_ssize_t w,
+                  Py_ssize_t h):
     """In [3]: unlocker.square("ABCDEF", 2, 3)
        Out[3]: 'ACEBDF'"""
 
-    cdef char*s = data
-    cdef char[1000] out
-    cdef unsigned short ptr = 0
-    cdef int outer
-    cdef int inner
+    cdef const unsigned char*s = data
+    cdef bytearray result = bytearray(w * h)
+    cdef unsigned char*out = result
+    cdef Py_ssize_t ptr = 0
+    cdef Py_ssize_t outer
+    cdef Py_ssize_t inner
 
     for outer in range(w):
         for inner in range(h):
             out[ptr] = s[outer + inner * w]
             ptr += 1
-    out[ptr] = 0
 
-    return out
+    return bytes(result)
 
-cdef inline bytes restore(char*s,
-                          char*t):
-    cdef char[1000] out
-    cdef unsigned short tcount = 0
-    cdef unsigned short scount = 0
+cdef bytes restore(bytes s,
+                   bytes t):
+    """Replace each non-black square in s with the next letter of t."""
+
+    cdef const unsigned char*sp = s
+    cdef const unsigned char*tp = t
+    cdef bytearray result = bytearray(s)
+    cdef unsigned char*out = result
+    cdef Py_ssize_t tcount = 0
+    cdef Py_ssize_t scount
 
     for scount in range(len(s)):
-        if s[scount] != 46:  # .
-            out[scount] = t[tcount]
+        if sp[scount] != 46:  # .
+            out[scount] = tp[tcount]
             tcount += 1
-        else:
-            out[scount] = b"."
-    return out
-
-cdef inline char*unscramble_string(bytes s,
-                                   unsigned short key):
-    cdef unsigned short l = len(s)
-    cdef char k
-    cdef unsigned char[4] keys
-    cdef char[1000] out
-    cdef unsigned short i
-    cdef char*s1
-
-    keys[0] = key / 1000
-    keys[1] = key % 1000 / 100
-    keys[2] = key % 100 / 10
-    keys[3] = key % 10
-
-    # loop 0
-    s = s[1::2] + s[::2]
-    s = s[l - keys[3]:] + s[:l - keys[3]]
-
-    s1 = s
-    for i in range(len(s1)):
-        out[i] = ((s1[i] - 65 - keys[i % 4]) % 26) + 65
-    out[i + 1] = 0
-    s = out
-
-
-    # loop 1
-    s = s[1::2] + s[::2]
-    s = s[l - keys[2]:] + s[:l - keys[2]]
-
-    s1 = s
-    for i in range(len(s1)):
-        out[i] = ((s1[i] - 65 - keys[i % 4]) % 26) + 65
-    out[i + 1] = 0
-    s = out
-
-
-    # loop 2
-    s = s[1::2] + s[::2]
-    s = s[l - keys[1]:] + s[:l - keys[1]]
-
-    s1 = s
-    for i in range(len(s1)):
-        out[i] = ((s1[i] - 65 - keys[i % 4]) % 26) + 65
-    out[i + 1] = 0
-    s = out
-
-
-    # loop 3
-    s = s[1::2] + s[::2]
-    s = s[l - keys[0]:] + s[:l - keys[0]]
-
-    s1 = s
-    for i in range(len(s1)):
-        out[i] = ((s1[i] - 65 - keys[i % 4]) % 26) + 65
-    out[i + 1] = 0
-    s = out
-
-    return s
+
+    return bytes(result)
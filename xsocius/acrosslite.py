@@ -2,13 +2,21 @@
 
 # Adapted with permission from https://github.com/alexdej/
 
+import re
 import string
 
+import os
+import copy
+import mmap
+import random
 import struct
 import operator
+from collections.abc import MutableSequence
+from array import array
 from functools import reduce
+from itertools import compress
 import warnings
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 
 HEADER_FORMAT = '''<
              H 11s        xH
@@ -59,18 +67,131 @@ Extensions = enum(
     Timer=b'LTIM',  # timer state
     Markup=b'GEXT')  # grid cell markup
 
+Verify = enum(
+    Eager='eager',  # check checksums on load, warning of mismatches
+    Lazy='lazy',  # keep file's checksums; check only when verify() is called
+    Skip='skip')  # don't check checksums at all
 
-def read(filename):
+
+def read(filename, mapped=False, verify=Verify.Eager):
     """Read a .puz file and return the Puzzle object
     throws PuzzleFormatError if there's any problem with the file format
+
+    filename can also be a file-like object open for reading bytes, such
+    as a stream from the network; it's read to the end (see parse).
+
+    If mapped is true, the file is memory-mapped instead of being read into
+    memory, and the title, author, copyright, clues and notes are only
+    decoded into strings when they're first used. This is much cheaper
+    when scanning lots of files for just a few fields.
+
+    verify is the checksum verification policy (see Verify); verifying
+    means checksumming the whole puzzle several times over.
     """
 
+    if hasattr(filename, 'read'):
+        return parse(filename.read(), verify=verify)
+
     with open(filename, 'rb') as f:
         puz = Puzzle()
-        puz.load(f.read())
+        if mapped:
+            puz.load(_map_file(f), lazy=True, verify=verify)
+        else:
+            puz.load(f.read(), verify=verify)
+            puz.note_layout_file(filename, os.fstat(f.fileno()))
         return puz
 
 
+def parse(data, verify=Verify.Eager):
+    """Parse .puz data and return the Puzzle object
+    throws PuzzleFormatError if there's any problem with the data format
+
+    data is bytes or any other bytes-like buffer, such as a puzzle received
+    over the network; nothing is read from or written to disk.
+
+    verify is the checksum verification policy (see Verify).
+    """
+
+    if not hasattr(data, 'find'):
+        # Like memoryview, can't be searched for the header; bytes can
+        data = bytes(data)
+
+    puz = Puzzle()
+    puz.load(data, verify=verify)
+    return puz
+
+
+PuzzleInfo = namedtuple('PuzzleInfo', [
+    'width',
+    'height',
+    'numclues',
+    'puzzletype',
+    'solution_state',
+    'version',
+    'title',
+    'author',
+    'copyright'])
+
+
+def probe(filename):
+    """Read just the basics of a .puz file and return a PuzzleInfo.
+
+    Only the header and the title, author and copyright are parsed; clues,
+    extensions and checksums are skipped. Use this for listing puzzles,
+    where read() would be far too much work.
+    throws PuzzleFormatError if the header can't be read
+    """
+
+    with open(filename, 'rb') as f, _map_file(f) as data:
+        s = PuzzleBuffer(data)
+        try:
+            header = _read_header(s)
+            width, height = header[8], header[9]
+
+            # Skip solution & filled-squares
+            s.skip(width * height * 2)
+
+            return PuzzleInfo(width=width,
+                              height=height,
+                              numclues=header[10],
+                              puzzletype=header[11],
+                              solution_state=header[12],
+                              version=header[4][:3],
+                              title=s.read_string(),
+                              author=s.read_string(),
+                              copyright=s.read_string())
+        finally:
+            # The map can't be closed while we hold a view onto it
+            s.release()
+
+
+def _read_header(s):
+    """Find start of puzzle in PuzzleBuffer s and unpack header from it."""
+
+    # .puz formats start with a 2-byte checksum and the magic string
+    # ACROSS&DOWN. However, it's possible that there might be additional
+    # stuff at the start of the file before this, and we'd like to keep
+    # it for round-tripping.
+    #
+    # Find ACROSS&DOWN and move 2 bytes before it to the start of the 
+    # checksum.
+
+    if not s.seek_to(ACROSSDOWN, -2):
+        raise PuzzleFormatError("Data does not appear to represent a puzzle.")
+
+    return s.unpack(HEADER_FORMAT)
+
+
+def _map_file(f):
+    """Return a read-only memory map of open file f."""
+
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Can't map an empty file
+        raise PuzzleFormatError("Data does not appear to represent a puzzle.")
+
+
 class PuzzleFormatError(Exception):
     """Indicates a format error in the .puz file
     
@@ -79,6 +200,70 @@ class PuzzleFormatError(Exception):
     """
 
 
+class LazyText:
+    """Text field that may hold undecoded bytes until first used.
+
+    When a puzzle is loaded lazily, the field holds a memoryview onto the
+    file data; this is decoded (and the view dropped) on first access.
+    """
+
+    def __init__(self, name, enc='ISO-8859-1'):
+        self.name = name
+        self.enc = enc
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name]
+        if isinstance(value, memoryview):
+            value = obj.__dict__[self.name] = str(value, self.enc)
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+class LazyTextList(MutableSequence):
+    """List of text that may hold undecoded bytes until first used.
+
+    Used for clues in lazily-loaded puzzles: each item is a memoryview onto
+    the file data until it is read, at which point it's decoded and kept.
+    """
+
+    def __init__(self, items=(), enc='ISO-8859-1'):
+        self.items = list(items)
+        self.enc = enc
+
+    def _decode(self, i):
+        value = self.items[i]
+        if isinstance(value, memoryview):
+            value = self.items[i] = str(value, self.enc)
+        return value
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._decode(j) for j in range(*i.indices(len(self.items)))]
+        return self._decode(i)
+
+    def __setitem__(self, i, value):
+        self.items[i] = value
+
+    def __delitem__(self, i):
+        del self.items[i]
+
+    def __len__(self):
+        return len(self.items)
+
+    def insert(self, i, value):
+        self.items.insert(i, value)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
 def is_blacksquare(c):
     """Is this square a black square?"""
 
@@ -89,6 +274,11 @@ class Puzzle:
     """Represents a puzzle
     """
 
+    title = LazyText('title')
+    author = LazyText('author')
+    copyright = LazyText('copyright')
+    notes = LazyText('notes')
+
     def __init__(self):
         """Initializes a blank puzzle
         """
@@ -124,24 +314,24 @@ class Puzzle:
 
         self.helpers = {}  # add-ons like Rebus and Markup
 
-    def load(self, data):
-        """Parse .puz data into puzzle object."""
+        self.cksums = ChecksumCache()  # memoized checksums of parts
+        self.file_cksums = None  # checksums found in file, if kept
 
-        s = PuzzleBuffer(data)
+        self.layout = None  # where things are in file on disk; see save()
 
-        # .puz formats start with a 2-byte checksum and the magic string
-        # ACROSS&DOWN. However, it's possible that there might be additional
-        # stuff at the start of the file before this, and we'd like to keep
-        # it for round-tripping.
-        #
-        # Find ACROSS&DOWN and move 2 bytes before it to the start of the 
-        # checksum.
+    def load(self, data, lazy=False, verify=Verify.Eager):
+        """Parse .puz data into puzzle object.
 
-        if not s.seek_to(ACROSSDOWN, -2):
-            raise PuzzleFormatError("Data does not appear to represent a puzzle.")
+        If lazy is true, text fields are kept as views onto data and only
+        decoded when first used; data must then be left unchanged.
 
-        # Keep any preamble for round-tripping
-        self.preamble = s.data[:s.pos]
+        verify is the checksum verification policy (see Verify).
+        """
+
+        s = PuzzleBuffer(data)
+
+        # Note where each section starts, for patching file on save
+        marks = []
 
         # Unpack header
         (cksum_gbl,
@@ -157,55 +347,99 @@ class Puzzle:
          numclues,
          self.puzzletype,
          self.solution_state
-         ) = s.unpack(HEADER_FORMAT)
+         ) = _read_header(s)
+
+        # Keep any preamble for round-tripping
+        self.preamble = s.data[:s.pos - struct.calcsize(HEADER_FORMAT)]
+        marks.append(('preamble', 0))
+        marks.append(('header', len(self.preamble)))
 
         self.version = self.fileversion[:3]
 
         # Read solution & filled-squares as strings
-        self.solution = s.read(self.width * self.height).decode('ISO-8859-1')
-        self.fill = s.read(self.width * self.height).decode()
+        marks.append(('solution', s.pos))
+        self.solution = str(s.read_view(self.width * self.height), 'ISO-8859-1')
+        marks.append(('fill', s.pos))
+        self.fill = str(s.read_view(self.width * self.height), 'utf-8')
+
+        # Read metadata as strings (or, if lazy, views to decode later)
+        marks.append(('text', s.pos))
+        read_text = s.read_string_view if lazy else s.read_string
 
-        # Read metadata as strings
-        self.title = s.read_string()
-        self.author = s.read_string()
-        self.copyright = s.read_string()
+        self.title = read_text()
+        self.author = read_text()
+        self.copyright = read_text()
 
         # Read clues as strings
-        self.clues = [s.read_string() for i in range(numclues)]
+        clues = [read_text() for i in range(numclues)]
+        self.clues = LazyTextList(clues) if lazy else clues
 
         # Read notes
-        self.notes = s.read_string()
+        self.notes = read_text()
 
         # Read extensions--markup, rebuses, timers, etc.
         # These are in chunks with a fixed header.
 
         ext_cksum = {}
         while s.can_unpack(EXT_HEADER_FORMAT):
+            start = s.pos
             code, length, cksum = s.unpack(EXT_HEADER_FORMAT)
+            marks.append((('ext', code), start))
             ext_cksum[code] = cksum
             # Extension data is represented as a null-terminated string, 
             # but since the data can contain nulls
             # we can't use read_string.
             self.extensions[code] = s.read(length)
-            s.read(1)  # extensions have a trailing byte
+            s.skip(1)  # extensions have a trailing byte
 
         # Save any extra garbage at the end of the file, usually \r\n
         # for round-tripping.
+        marks.append(('postscript', s.pos))
         if s.can_read():
             self.postscript = s.read_to_end()
 
+        # Lazy loads are for reading lots of puzzles, not saving them, so
+        # don't bother copying out the sections.
+        if not lazy:
+            ends = [start for name, start in marks[1:]] + [len(s.data)]
+            self.layout = {'regions': [(name, start, s.data[start:end])
+                                       for (name, start), end in zip(marks, ends)]}
+
+        if verify != Verify.Skip:
+            self.file_cksums = {'header': cksum_hdr,
+                                'global': cksum_gbl,
+                                'magic': cksum_magic,
+                                'ext': ext_cksum}
+
+        if verify == Verify.Eager:
+            for problem in self.verify():
+                warnings.warn(problem, UserWarning)
+
+    def verify(self):
+        """Check puzzle against checksums found in file.
+
+        Returns list of problems found (empty if all is well). This checks
+        the puzzle as it is now, so call before making changes. Puzzles
+        loaded with Verify.Skip have nothing to check against, so pass.
+        """
+
+        if self.file_cksums is None:
+            return []
+
         # Valid puzzles fail these tests sometimes -- problem in the code?
 
-        if cksum_hdr != self.header_cksum():
-            warnings.warn("Header checksum does not match", UserWarning)
-        if cksum_gbl != self.global_cksum():
-            warnings.warn("Global checksum does not match", UserWarning)
-        if cksum_magic != self.magic_cksum():
-            warnings.warn("Magic checksum does not match", UserWarning)
-        for code, cksum_ext in list(ext_cksum.items()):
+        problems = []
+        if self.file_cksums['header'] != self.header_cksum():
+            problems.append("Header checksum does not match")
+        if self.file_cksums['global'] != self.global_cksum():
+            problems.append("Global checksum does not match")
+        if self.file_cksums['magic'] != self.magic_cksum():
+            problems.append("Magic checksum does not match")
+        for code, cksum_ext in list(self.file_cksums['ext'].items()):
             if cksum_ext != data_cksum(self.extensions[code]):
-                warnings.warn("Extension {} checksum does not match".format(code),
-                              UserWarning)
+                problems.append("Extension {} checksum does not match".format(code))
+
+        return problems
 
     def has_rebus(self):
         """Does puzzle have a rebus section?"""
@@ -240,11 +474,12 @@ class Puzzle:
     def clue_numbering(self):
         """Return clue numbering object; computing the first time."""
 
-        return self.helpers.setdefault('clues',
-                                       DefaultClueNumbering(self.fill,
-                                                            self.clues,
-                                                            self.width,
-                                                            self.height))
+        if 'clues' not in self.helpers:
+            self.helpers['clues'] = DefaultClueNumbering(self.fill,
+                                                         self.clues,
+                                                         self.width,
+                                                         self.height)
+        return self.helpers['clues']
 
     def check_answers(self, fill):
         """Return True if puzzle is solved."""
@@ -259,20 +494,82 @@ class Puzzle:
     # --------------- Saving puzzle
 
     def save(self, filename):
-        """Save puzzle to disk."""
+        """Save puzzle to disk.
+
+        If filename is the file we were read from (or last saved to), and no
+        one else has changed it since, only the bytes that have changed are
+        written, in place. When solving, this is the usual case: only the
+        fill, markup, timer and checksums change, and all sit at fixed
+        places in the file.
+
+        Otherwise (for instance, a rebus section was added), the whole file
+        is written to a temporary file which then replaces filename, so a
+        failed save never leaves a half-written puzzle.
+        """
 
         # In case of problem with conversion, do this before overwriting file
-        data = self.to_string()
+        pieces = self._pieces()
 
-        with open(filename, 'wb') as f:
-            f.write(data)
+        if not self._patch(filename, pieces):
+            write_atomic(filename, b''.join(data for name, data in pieces))
 
-    def to_string(self):
-        """Create stringified version of puzzle data for saving."""
+        self.layout = {'regions': []}
+        offset = 0
+        for name, data in pieces:
+            self.layout['regions'].append((name, offset, data))
+            offset += len(data)
+        self.note_layout_file(filename, os.stat(filename))
 
-        # Construct a new buffer, filling in the correct information.
+    def note_layout_file(self, filename, st):
+        """Note that our layout is that of filename, with os.stat() result st.
 
-        s = PuzzleBuffer()
+        If this file changes behind our back, we can't patch it on save.
+        """
+
+        if self.layout is not None:
+            self.layout['path'] = os.path.abspath(filename)
+            self.layout['stat'] = (st.st_size, st.st_mtime_ns)
+
+    def _patch(self, filename, pieces):
+        """Patch changed bytes of pieces into filename, if we can.
+
+        Returns True if file was patched, False if it needs rewriting.
+        """
+
+        layout = self.layout
+        if (layout is None
+                or layout.get('path') != os.path.abspath(filename)
+                or [name for name, data in pieces] !=
+                [name for name, start, data in layout['regions']]):
+            return False
+
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return False
+        if (st.st_size, st.st_mtime_ns) != layout['stat']:
+            return False
+
+        changes = []
+        for (name, data), (_, start, old) in zip(pieces, layout['regions']):
+            if data == old:
+                continue
+            if len(data) != len(old):
+                # Layout changed
+                return False
+            changes.extend((start + i, data[i:j]) for i, j in diff_runs(old, data))
+
+        with open(filename, 'r+b') as f:
+            for offset, chunk in changes:
+                f.seek(offset)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        return True
+
+    def save_helpers(self):
+        """Push changes made in helpers back into extensions."""
 
         # For any helpers (rebus, markup), call their save method, which
         # will push any changes made back the puzzle.extensions dictionary.
@@ -281,10 +578,40 @@ class Puzzle:
             if 'save' in dir(h):
                 h.save()
 
+    def snapshot(self):
+        """Return copy of puzzle that can be saved while this one changes.
+
+        The copy has its own clues, extensions and checksum cache, and no
+        helpers, so saving it (say, from another thread) never touches this
+        puzzle.
+        """
+
+        self.save_helpers()
+
+        snap = copy.copy(self)
+        snap.helpers = {}
+        snap.cksums = self.cksums.copy()
+        snap.clues = list(self.clues)
+        snap.extensions = OrderedDict(
+            (code, data if isinstance(data, (bytes, str)) else bytes(data))
+            for code, data in self.extensions.items())
+        return snap
+
+    def to_string(self):
+        """Create stringified version of puzzle data for saving."""
+
+        return b''.join(data for name, data in self._pieces())
+
+    def _pieces(self):
+        """Return list of (section name, bytes) that make up puzzle data."""
+
+        self.save_helpers()
+
         # Include any preamble text we might have found on read
-        s.write(self.preamble)
+        pieces = [('preamble', self.preamble)]
 
         # Write header
+        s = PuzzleBuffer()
         s.pack(HEADER_FORMAT,
                self.global_cksum(),
                ACROSSDOWN,
@@ -299,12 +626,14 @@ class Puzzle:
                len(self.clues),
                self.puzzletype,
                self.solution_state)
+        pieces.append(('header', s.as_bytes()))
 
         # Write solution and fill as bytestrings
-        s.write(self.solution.encode())
-        s.write(self.fill.encode())
+        pieces.append(('solution', self.solution.encode()))
+        pieces.append(('fill', self.fill.encode()))
 
         # Write metadata
+        s = PuzzleBuffer()
         s.write_string(self.title)
         s.write_string(self.author)
         s.write_string(self.copyright)
@@ -315,10 +644,12 @@ class Puzzle:
 
         # Write notes as string
         s.write_string(self.notes)
+        pieces.append(('text', s.as_bytes()))
 
         # Write extensions back
 
         for code, data in self.extensions.items():
+            s = PuzzleBuffer()
             s.pack(EXT_HEADER_FORMAT,
                    code,
                    len(data),
@@ -331,12 +662,13 @@ class Puzzle:
                 data = data.encode()
 
             s.write(data + b'\0')
+            pieces.append((('ext', code), s.as_bytes()))
 
         # Write any trailing material for original file
 
-        s.write(self.postscript)
+        pieces.append(('postscript', self.postscript))
 
-        return s.as_bytes()
+        return pieces
 
     # --------------- Locked (Scrambled Solution) Puzzles
 
@@ -380,22 +712,46 @@ class Puzzle:
                                               key)
 
     # --------------- Checksum Stuff
+    #
+    # The global and magic checksums are both built from checksums of the
+    # header, solution, fill and text. These parts are memoized in
+    # self.cksums, so each is only recomputed when it has changed.
 
     def header_cksum(self, cksum=0):
         """Return checksum of header section."""
 
-        return data_cksum(
-            struct.pack(HEADER_CKSUM_FORMAT,
-                        self.width,
-                        self.height,
-                        len(self.clues),
-                        self.puzzletype,
-                        self.solution_state),
-            cksum)
+        header = struct.pack(HEADER_CKSUM_FORMAT,
+                             self.width,
+                             self.height,
+                             len(self.clues),
+                             self.puzzletype,
+                             self.solution_state)
+
+        return self.cksums.get('header', header, cksum,
+                               lambda seed: data_cksum(header, seed))
+
+    def solution_cksum(self, cksum=0):
+        """Return checksum of solution."""
+
+        solution = self.solution
+        return self.cksums.get('solution', solution, cksum,
+                               lambda seed: data_cksum(solution, seed))
+
+    def fill_cksum(self, cksum=0):
+        """Return checksum of fill."""
+
+        fill = self.fill
+        return self.cksums.get('fill', fill, cksum,
+                               lambda seed: data_cksum(fill, seed))
 
     def text_cksum(self, cksum=0):
         """Checksum of textual parts of puzzle."""
 
+        text = (self.version, self.title, self.author, self.copyright,
+                self.notes, tuple(self.clues))
+        return self.cksums.get('text', text, cksum, self._text_cksum)
+
+    def _text_cksum(self, cksum):
         # For the checksum to work these fields must be added in order with
         # null termination, followed by all non-empty clues without null
         # termination, followed by notes (but only for version 1.3)
@@ -421,8 +777,8 @@ class Puzzle:
         """Return global checksum of puzzle."""
 
         cksum = self.header_cksum()
-        cksum = data_cksum(self.solution, cksum)
-        cksum = data_cksum(self.fill, cksum)
+        cksum = self.solution_cksum(cksum)
+        cksum = self.fill_cksum(cksum)
         cksum = self.text_cksum(cksum)
         # Extensions do not seem to be included in global cksum
 
@@ -433,8 +789,8 @@ class Puzzle:
 
         cksums = [
             self.header_cksum(),
-            data_cksum(self.solution),
-            data_cksum(self.fill),
+            self.solution_cksum(),
+            self.fill_cksum(),
             self.text_cksum()
         ]
 
@@ -447,18 +803,120 @@ class Puzzle:
         return cksum_magic
 
 
+def write_atomic(filename, data):
+    """Write data to filename, all or nothing.
+
+    Data is written and synced to a temporary file in the same directory,
+    which then replaces filename.
+    """
+
+    tmp_path = '{}.{}.tmp'.format(filename, random.randrange(1 << 32))
+
+    try:
+        with open(tmp_path, 'xb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Keep permissions of file we're replacing
+        try:
+            os.chmod(tmp_path, os.stat(filename).st_mode & 0o7777)
+        except OSError:
+            pass
+
+        os.replace(tmp_path, filename)
+
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def diff_runs(old, new, gap=8):
+    """Yield (start, end) of runs where equal-length old and new differ.
+
+    Runs less than gap bytes apart are merged, so we don't write lots of
+    tiny pieces.
+    """
+
+    start = end = None
+    for i, (a, b) in enumerate(zip(old, new)):
+        if a != b:
+            if start is None:
+                start = i
+            elif i - end >= gap:
+                yield start, end
+                start = i
+            end = i + 1
+
+    if start is not None:
+        yield start, end
+
+
+class ChecksumCache:
+    """Memoizes checksums of the parts of a puzzle.
+
+    For each part (header, solution, fill, text), keeps the last checksum
+    computed on its own and the last computed with a seed (as it is when
+    chained into the global checksum), along with the value it was computed
+    from. A checksum is only recomputed when that value has changed, however
+    the change was made.
+    """
+
+    def __init__(self):
+        self.slots = {}
+
+    def get(self, part, value, seed, compute):
+        """Return checksum of part for value, using compute(seed) if needed."""
+
+        slot = (part, bool(seed))
+        hit = self.slots.get(slot)
+        if hit and hit[1] == seed and (hit[0] is value or hit[0] == value):
+            return hit[2]
+
+        cksum = compute(seed)
+        self.slots[slot] = (value, seed, cksum)
+        return cksum
+
+    def clear(self):
+        """Forget all checksums."""
+
+        self.slots.clear()
+
+    def copy(self):
+        """Return new cache starting with the same checksums.
+
+        Values checksummed are immutable, so the copies can be used (and
+        added to) independently, such as from different threads.
+        """
+
+        cache = ChecksumCache()
+        cache.slots = dict(self.slots)
+        return cache
+
+
 class PuzzleBuffer:
     """Buffer for dealing with puzzle raw data.
 
-    Wraps a data buffer ('' or []) and provides .puz-specific methods for
-    reading and writing data.
+    Wraps a data buffer (bytes to read, or None to write to a list) and
+    provides .puz-specific methods for reading and writing data. Any
+    bytes-like buffer (including an mmap) can be read; the read_view
+    methods return memoryviews onto it, not copies.
     """
 
     def __init__(self, data=None, enc='ISO-8859-1'):
-        self.data = data or []
+        # Empty data is still data, so reading it fails as a bad puzzle
+        self.data = data if data is not None else []
         self.enc = enc
         self.pos = 0
 
+        if isinstance(self.data, list):
+            self.view = None
+        else:
+            self.view = memoryview(self.data)
+
     def can_read(self, nbytes=1):
         """Can we read nbytes from our current position?"""
 
@@ -471,6 +929,24 @@ class PuzzleBuffer:
         self.pos += nbytes
         return self.data[start:self.pos]
 
+    def read_view(self, nbytes):
+        """Read nbytes and return as memoryview, without copying."""
+
+        start = self.pos
+        self.pos += nbytes
+        return self.view[start:self.pos]
+
+    def skip(self, nbytes):
+        """Move past nbytes without reading them."""
+
+        self.pos += nbytes
+
+    def release(self):
+        """Release our view onto the data, so that it may be closed."""
+
+        if self.view is not None:
+            self.view.release()
+
     def read_to_end(self):
         """Read until end and return as bytes."""
 
@@ -481,9 +957,14 @@ class PuzzleBuffer:
     def read_string(self):
         """Read null-terminated string and return as string."""
 
+        return str(self.read_string_view(), self.enc)
+
+    def read_string_view(self):
+        """Read null-terminated string and return as memoryview of bytes."""
+
         start = self.pos
         self.seek_to(b'\0', 1)  # read past
-        return self.data[start:self.pos - 1].decode(self.enc)
+        return self.view[start:self.pos - 1]
 
     def seek_to(self, s, offset=0):
         """Seek to bytes <s> in buffer + offset.
@@ -493,14 +974,15 @@ class PuzzleBuffer:
         Returns True on success or False on failure.
         """
 
-        try:
-            self.pos = self.data.index(s, self.pos) + offset
-            return True
-        except ValueError:
+        found = self.data.find(s, self.pos)
+        if found == -1:
             # s not found, advance to end
             self.pos = len(self.data)
             return False
 
+        self.pos = found + offset
+        return True
+
     def write(self, s):
         """Write bytes <s> to buffer."""
 
@@ -546,86 +1028,86 @@ class PuzzleBuffer:
 class DefaultClueNumbering:
     """Utility to convert raw grid and raw clue list to numbered clues.
 
-    Set across and down to lists of dictionaries for each across/down clue:
-      num: human number for clue (ie, 3 in 3D)
-      clue: clue text
-      cell: 0-based index for cell in grid
-      len: lenght of word
+    Sets across_nums, across_cells, across_lens, and across_clues to the
+    number (ie, 3 in 3D), 0-based index of first cell in grid, length, and
+    text of each across clue, as compact arrays (and a list, for text).
+    Same for down.
+
+    For convenience, across and down give these as lists of dictionaries
+    for each across/down clue, with keys num, clue, cell, and len.
     """
 
+    # A word is a run of at least two non-black squares
+    _word_re = re.compile(r'[^%s]{2,}' % re.escape(BLACKSQUARE))
+
     def __init__(self, grid, clues, width, height):
         self.grid = grid
         self.clues = clues
         self.width = width
         self.height = height
 
-        self.across = []
-        self.down = []
+        size = width * height
 
-        # Index into list of clues found in puzzle data
-        clueidx = 0
+        # Find words in one pass over rows and one over columns, noting
+        # the length of the word starting at each cell, and marking cells
+        # that start any word
 
-        # Human-facing clue number (ie, clue number 1 might be for 1A and 1D)
-        cluenum = 1
+        starts = bytearray(size)
 
-        # Loop over each cell in grid. If word starts here, get clue and
-        # add to list of across/down clue, as appropriate.
+        across_len = array('i', [0]) * size
+        for start in range(0, size, width):
+            for m in self._word_re.finditer(grid, start, start + width):
+                across_len[m.start()] = m.end() - m.start()
+                starts[m.start()] = 1
 
-        for i in range(0, len(grid)):
-
-            if is_blacksquare(grid[i]):
-                continue
+        down_len = array('i', [0]) * size
+        for x in range(width):
+            for m in self._word_re.finditer(grid[x:size:width]):
+                down_len[x + m.start() * width] = m.end() - m.start()
+                starts[x + m.start() * width] = 1
 
-            found = False
+        # Number cells that start words, in order; clues are listed in the
+        # puzzle data in that order, across before down for each cell.
 
-            # Are we at left edge of puzzle or word?
-            if ((self._col(i) == 0 or is_blacksquare(grid[i - 1]))
-                and self._len_across(i) > 1):
-                self.across.append({'num': cluenum,
-                                    'clue': clues[clueidx],
-                                    'cell': i,
-                                    'len': self._len_across(i)})
-                clueidx += 1
-                found = True
+        self.across_nums = array('i')
+        self.across_cells = array('i')
+        self.across_lens = array('i')
+        self.across_clues = []
+        self.down_nums = array('i')
+        self.down_cells = array('i')
+        self.down_lens = array('i')
+        self.down_clues = []
 
+        clueidx = 0
 
-            # Are we at top row of puzzle or word?
-            if ((self._row(i) == 0 or is_blacksquare(grid[i - width]))
-                and self._len_down(i) > 1):
-                self.down.append({'num': cluenum,
-                                  'clue': clues[clueidx],
-                                  'cell': i,
-                                  'len': self._len_down(i)})
+        for cluenum, i in enumerate(compress(range(size), starts), start=1):
+            if across_len[i]:
+                self.across_nums.append(cluenum)
+                self.across_cells.append(i)
+                self.across_lens.append(across_len[i])
+                self.across_clues.append(clues[clueidx])
                 clueidx += 1
-                found = True
-
-            # If we found any clues here, bump up the human clue number for
-            # the next time around.
 
-            if found:
-                cluenum += 1
-
-    def _col(self, i):
-        # Column for this index (0-based)
-        return i % self.width
-
-    def _row(self, i):
-        # Row for this index (0-based)
-        return i // self.width
+            if down_len[i]:
+                self.down_nums.append(cluenum)
+                self.down_cells.append(i)
+                self.down_lens.append(down_len[i])
+                self.down_clues.append(clues[clueidx])
+                clueidx += 1
 
-    def _len_across(self, i):
-        # Length of across word at index i
-        for c in range(0, self.width - self._col(i)):
-            if is_blacksquare(self.grid[i + c]):
-                return c
-        return c + 1
+    @property
+    def across(self):
+        return [{'num': num, 'clue': clue, 'cell': cell, 'len': length}
+                for num, clue, cell, length in zip(
+                    self.across_nums, self.across_clues,
+                    self.across_cells, self.across_lens)]
 
-    def _len_down(self, i):
-        # Length of down word at index i
-        for c in range(0, self.height - self._row(i)):
-            if is_blacksquare(self.grid[i + c * self.width]):
-                return c
-        return c + 1
+    @property
+    def down(self):
+        return [{'num': num, 'clue': clue, 'cell': cell, 'len': length}
+                for num, clue, cell, length in zip(
+                    self.down_nums, self.down_clues,
+                    self.down_cells, self.down_lens)]
 
 
 class Rebus:
@@ -689,7 +1171,6 @@ class Timer:
         self.timer = self.puzzle.extensions.get(Extensions.Timer, b'')
 
         if self.timer:
-            print(self.timer)
             elapsed_sec, paused = self.timer.split(b',')
             self.elapsed_sec = int(elapsed_sec)
             self.paused = bool(int(paused))
@@ -748,6 +1229,19 @@ def data_cksum(data, cksum=0):
     return cksum
 
 
+# There is a c-based checksummer but it may not work for all systems, so
+# fall back on the slower Python-based one above. Both give identical results.
+
+py_data_cksum = data_cksum
+
+try:
+    from xsocius.cksum import data_cksum
+
+    FAST_CKSUM = True
+except ImportError:
+    FAST_CKSUM = False
+
+
 def scramble_solution(solution,
                       width,
                       height,
@@ -9,11 +9,16 @@ import sys
 import logging
 import atexit
 
+import os
+
 import wx
 import wx.adv
 import xsocius.log
 from xsocius.utils import NAME
 from xsocius.puzzle import Puzzle, DiagramlessPuzzleFormatError
+from xsocius.library import PuzzleIndex, Indexer
+from xsocius.saver import SaveWorker
+from xsocius.keycache import KeyCache
 from xsocius.gui.about import AboutBox
 from xsocius.gui.config import XsociusConfig
 from xsocius.gui.window import DummyWindow
@@ -24,7 +29,7 @@ from xsocius.gui.prefs import showPrefsDialog
 from xsocius.gui.upgrade import prompt_update_version, newest_version_info
 from xsocius.gui.utils import get_tips
 from xsocius.gui.bugreport import showBugReport
-from xsocius.acrosslite import PuzzleFormatError
+from xsocius.acrosslite import PuzzleFormatError, Verify
 
 
 class XsociusApp(wx.App):
@@ -33,6 +38,10 @@ class XsociusApp(wx.App):
     windows = []
     config = None
     dummy = None
+    indexer = None
+    library = None
+    saver = None
+    unlock_keys = None
 
     def OnInit(self):
         """Finish setup of application."""
@@ -46,6 +55,23 @@ class XsociusApp(wx.App):
 
         self.config = XsociusConfig()
 
+        # Keep the library index of our crosswords directory up to date in the
+        # background; self.library is for querying it from here.
+
+        library_path = os.path.join(self.config.getSupportDir(), "library.db")
+        self.indexer = Indexer(library_path, self.config.getCrosswordsDir())
+        self.indexer.start()
+        self.indexer.rescan()
+        self.library = PuzzleIndex(library_path)
+
+        # Puzzles are saved in the background, so slow disks don't hold us up
+        self.saver = SaveWorker()
+        self.saver.start()
+
+        # Keys that unlocked puzzles, to try first on others from same place
+        self.unlock_keys = KeyCache(
+            os.path.join(self.config.getSupportDir(), "unlock_keys.json"))
+
         # Get newest version, if applicable
         if self.config.check_upgrades:
             newest, change, date = newest_version_info()
@@ -152,9 +178,14 @@ class XsociusApp(wx.App):
     def OnExit(self):
         """Exiting app."""
 
-        # Nothing special needed.
-        # Kept around in case code needed here, but for now this 
-        # will just delegate to superclass.
+        # Finish any saves still underway
+        if self.saver:
+            self.saver.stop()
+
+        # Let library indexer finish what it's doing
+        if self.indexer:
+            self.indexer.stop()
+
         return super().OnExit()
 
     def NewWindow(self, title, size, minsize):
@@ -183,8 +214,16 @@ class XsociusApp(wx.App):
         self.windows.append(window)
         return window
 
-    def open_puzzle(self, path, as_unsolved=False, reuse_window=False):
-        """Open puzzle."""
+    def open_puzzle(self, path, as_unsolved=False, reuse_window=False,
+                    verify=Verify.Eager, data=None):
+        """Open puzzle.
+
+        verify is the checksum verification policy (see acrosslite.Verify).
+
+        If data is given, the puzzle is set up from it (see
+        Puzzle.load_data) rather than read from path, which is only where
+        it will be saved.
+        """
 
         logging.debug("Request open puzzle: %s.", path)
 
@@ -197,7 +236,10 @@ class XsociusApp(wx.App):
         puzzle = Puzzle()
 
         try:
-            puzzle.load(path)
+            if data is None:
+                puzzle.load(path, verify=verify)
+            else:
+                puzzle.load_data(data, path, verify=verify)
 
         except DiagramlessPuzzleFormatError:
             logging.error("Not valid puzzle format: %s", path)
@@ -224,8 +266,12 @@ class XsociusApp(wx.App):
         minh = puzzle.height * 22 + 25
         logging.debug("Opening size w=%s, h=%s", w, h)
 
-        self.config.addRecentFile(path)
-        logging.debug("recent files added")
+        # A puzzle set up from data isn't on disk until it's saved; it's
+        # added to recent files and the library then (see _puzzle_saved)
+        if data is None:
+            self.config.addRecentFile(path)
+            self.indexer.refresh(path)
+            logging.debug("recent files added")
 
         if reuse_window:
             window = self
@@ -1,11 +1,31 @@
 """Crossword GUI board area."""
 
 import logging
+from functools import lru_cache
 
 import wx
 from xsocius.gui.utils import font_scale
 
 
+@lru_cache(maxsize=32)
+def _font(size, weight):
+    """Return board font of size (points, or (w, h) in pixels) and weight.
+
+    Fonts, like pens and brushes, are shared by all boards of the same
+    size rather than made by each window.
+    """
+
+    return wx.Font(size, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, weight)
+
+
+def _pen(colour, width=1):
+    return wx.ThePenList.FindOrCreatePen(colour, width)
+
+
+def _brush(colour):
+    return wx.TheBrushList.FindOrCreateBrush(colour)
+
+
 class PresentationBoardMixin:
     """Presentation components for board.
 
@@ -75,52 +95,29 @@ class PresentationBoardMixin:
         font_size = rect_size * 0.7
         if wx.Platform == "__WXMSW__":
             fs = font_size * 0.65
-            self.letterFont = wx.Font(fs,
-                                      wx.FONTFAMILY_DEFAULT,
-                                      wx.FONTSTYLE_NORMAL,
-                                      wx.FONTWEIGHT_BOLD)
-            self.pencilFont = wx.Font(fs,
-                                      wx.FONTFAMILY_DEFAULT,
-                                      wx.FONTSTYLE_NORMAL,
-                                      wx.FONTWEIGHT_NORMAL)
+            self.letterFont = _font(fs, wx.FONTWEIGHT_BOLD)
+            self.pencilFont = _font(fs, wx.FONTWEIGHT_NORMAL)
         else:
-            self.letterFont = wx.Font((font_size, font_size),  # 2to3
-                                      wx.FONTFAMILY_DEFAULT,
-                                      wx.FONTSTYLE_NORMAL,
-                                      wx.FONTWEIGHT_BOLD)
-            self.pencilFont = wx.Font((font_size, font_size),
-                                      wx.FONTFAMILY_DEFAULT,
-                                      wx.FONTSTYLE_NORMAL,
-                                      wx.FONTWEIGHT_NORMAL)
+            self.letterFont = _font((font_size, font_size),  # 2to3
+                                    wx.FONTWEIGHT_BOLD)
+            self.pencilFont = _font((font_size, font_size),
+                                    wx.FONTWEIGHT_NORMAL)
 
         # Special font is used for rebus entries (>1 letter in square)
 
         if wx.Platform == "__WXMSW__":
-            fs = rect_size // 4
-            self.specialFont = wx.Font(fs,
-                                       wx.FONTFAMILY_DEFAULT,
-                                       wx.FONTSTYLE_NORMAL,
-                                       wx.FONTWEIGHT_BOLD)
+            self.specialFont = _font(rect_size // 4, wx.FONTWEIGHT_BOLD)
         else:
-            self.specialFont = wx.Font((font_size / 2, font_size / 2),
-                                       wx.FONTFAMILY_DEFAULT,
-                                       wx.FONTSTYLE_NORMAL,
-                                       wx.FONTWEIGHT_BOLD)
+            self.specialFont = _font((font_size / 2, font_size / 2),
+                                     wx.FONTWEIGHT_BOLD)
 
         # Numbering font for clue #s in grid
 
         if wx.Platform == "__WXMSW__":
-            fs = rect_size // 3.5
-            self.numberFont = wx.Font(fs,
-                                      wx.FONTFAMILY_DEFAULT,
-                                      wx.FONTSTYLE_NORMAL,
-                                      wx.FONTWEIGHT_NORMAL)
+            self.numberFont = _font(rect_size // 3.5, wx.FONTWEIGHT_NORMAL)
         else:
-            self.numberFont = wx.Font(
-                (font_size * 0.58, font_size * 0.58),
-                wx.FONTFAMILY_DEFAULT,
-                wx.FONTSTYLE_NORMAL,
-                wx.FONTWEIGHT_BOLD)
+            self.numberFont = _font((font_size * 0.58, font_size * 0.58),
+                                    wx.FONTWEIGHT_BOLD)
 
     def setupColors(self):
         """Setup colors for drawing."""
@@ -137,15 +134,15 @@ class PresentationBoardMixin:
         self.graphic_checked_color = config.graphic_checked_color
         self.graphic_cheat_color = config.graphic_cheat_color
 
-        self.graphic_error_pen = wx.Pen(self.graphic_error_color)
-        self.graphic_checked_pen = wx.Pen(self.graphic_checked_color)
-        self.graphic_cheat_pen = wx.Pen(self.graphic_cheat_color)
-        self.graphic_error_brush = wx.Brush(self.graphic_error_color)
-        self.graphic_checked_brush = wx.Brush(self.graphic_checked_color)
-        self.graphic_cheat_brush = wx.Brush(self.graphic_cheat_color)
-        self.focus_pen = wx.Pen("#5555BB", 2)
-        self.circle_pen = wx.Pen("#777777")
-        self.circle_brush = wx.Brush("#DDDDDD")
+        self.graphic_error_pen = _pen(self.graphic_error_color)
+        self.graphic_checked_pen = _pen(self.graphic_checked_color)
+        self.graphic_cheat_pen = _pen(self.graphic_cheat_color)
+        self.graphic_error_brush = _brush(self.graphic_error_color)
+        self.graphic_checked_brush = _brush(self.graphic_checked_color)
+        self.graphic_cheat_brush = _brush(self.graphic_cheat_color)
+        self.focus_pen = _pen("#5555BB", 2)
+        self.circle_pen = _pen("#777777")
+        self.circle_brush = _brush("#DDDDDD")
 
         self.flag_graphic = config.flag_graphic
         self.flag_letter = config.flag_letter
@@ -153,20 +150,20 @@ class PresentationBoardMixin:
         if self.printout:
             self.color_cell_pen = wx.Pen("Black", 0.75)
         else:
-            self.color_cell_pen = wx.Pen("Black")
+            self.color_cell_pen = _pen("Black")
 
-        self.cell_highlight_brush = wx.Brush("#FFBBBB")  # lit up in sharing
-        self.cell_flash_brush = wx.Brush("#BBFFBB")  # curr word right
-        self.cell_flashbad_brush = wx.Brush("#FF9999")  # curr word wrong
-        self.cell_curr_cell_brush = wx.Brush("Gold")  # cell we're on
-        self.cell_curr_word_brush = wx.Brush("Goldenrod")  # word we're in
-        self.cell_black_brush = wx.Brush("Black")  # black square
-        self.cell_normal_brush = wx.Brush("White")  # otherwise
+        self.cell_highlight_brush = _brush("#FFBBBB")  # lit up in sharing
+        self.cell_flash_brush = _brush("#BBFFBB")  # curr word right
+        self.cell_flashbad_brush = _brush("#FF9999")  # curr word wrong
+        self.cell_curr_cell_brush = _brush("Gold")  # cell we're on
+        self.cell_curr_word_brush = _brush("Goldenrod")  # word we're in
+        self.cell_black_brush = _brush("Black")  # black square
+        self.cell_normal_brush = _brush("White")  # otherwise
 
         if wx.Platform == "__WXGTK__" or self.printout or self.demo:
-            self.background_brush = wx.Brush("WHITE")
+            self.background_brush = _brush("WHITE")
         else:
-            self.background_brush = wx.Brush(self.GetBackgroundColour())
+            self.background_brush = _brush(self.GetBackgroundColour())
 
     def drawCells(self, width, height, grid, rects, live, showflags, dc):
         """Draw cells on grid."""
@@ -5,13 +5,15 @@ import logging
 import random
 import wx
 import wx.lib.buttons as buttons
+import wx.lib.agw.pybusyinfo as PBI
 from wx.lib.splitter import MultiSplitterWindow
 from xsocius.utils import suggestSafeFilename
-from xsocius.puzzle import FAST_UNLOCK
+from xsocius.keycache import puzzle_source
 from xsocius.gui.window import BaseWindow
 from xsocius.gui.board import Board
 from xsocius.gui.oneacross import OpenOneAcross
 from xsocius.gui.google import OpenGoogle
+from xsocius.gui.web import WebSourceId
 from xsocius.gui.clues import CluesPanel
 from xsocius.gui.undo import UndoRedoMixin
 from xsocius.gui.clipboard import ClipboardMixin
@@ -255,6 +257,8 @@ class PuzzleWindow(BaseWindow,
         self.tournamentSettings()
         config = wx.GetApp().config
         self.puzzle.grey_filled_clues = config.grey_filled_clues
+        if self.puzzle.grey_filled_clues:
+            self.puzzle.check_clue_fill_change(force=True)
         self.puzzle.on_any_change(skip_check_finished=True)
 
         self.need_show_locked = self.puzzle.pfile.is_solution_locked()
@@ -376,10 +380,7 @@ class PuzzleWindow(BaseWindow,
         or by partner choosing clear.
         """
 
-        for x in self.puzzle.grid:
-            for y in x:
-                if not y.black:
-                    y.reset()
+        self.puzzle.clear_puzzle()
 
         self.startPuzzle()
         self.board.DrawNow()
@@ -469,6 +470,7 @@ class PuzzleWindow(BaseWindow,
     def DoClose(self):
         """Check if we're dirty and, if so, prompt to save."""
 
+        abandon = False
         if self.puzzle.dirty:
             dlg = wx.MessageDialog(self,
                                    ('The document "%s" has unsaved changes.\n\n'
@@ -481,7 +483,14 @@ class PuzzleWindow(BaseWindow,
             if result == wx.ID_CANCEL:
                 return False
             elif result == wx.ID_YES:
-                self._save_puzzle()
+                self._save_puzzle(wait=True)
+            else:
+                abandon = True
+
+        # Make sure any earlier save is done before throwing away journal;
+        # if saving failed, keep it, so changes can be recovered on reopening
+        wx.GetApp().saver.flush()
+        self.puzzle.close(keep_journal=self.puzzle.save_failed and not abandon)
 
         # Remove this window's menu from updating recent files
         wx.GetApp().config.filehistory.RemoveMenu(self.RecentMenu)
@@ -506,21 +515,50 @@ class PuzzleWindow(BaseWindow,
 
         logging.debug("On close done")
 
-    def _save_puzzle(self, path=None):
-        """Save puzzle, showing errors.
+    def _save_puzzle(self, path=None, wait=False, add_recent=False):
+        """Save puzzle in the background, showing errors.
         
-        Called by DoClose, OnQuit, OnSave, and OnSaveAs.
+        Called by DoClose, OnQuit, OnSave, and OnSaveAs. If wait, don't
+        return until the puzzle is on disk (for when we're closing). If
+        add_recent, add it to recent files once it's there (for a puzzle
+        that wasn't opened from disk).
         """
 
-        try:
-            self.puzzle.save_puzzle(path)
-        except IOError as e:
-            dlg = wx.MessageDialog(None, "Fail saved: %s" % e,
+        path = path or self.puzzle.path
+        saver = wx.GetApp().saver
+
+        if wait:
+            results = []
+            self.puzzle.save_puzzle(path, saver,
+                                    lambda snapshot, error: results.append((snapshot, error)))
+            saver.flush()
+            self._puzzle_saved(path, *results[0], add_recent=add_recent)
+        else:
+            self.puzzle.save_puzzle(
+                path, saver,
+                lambda snapshot, error: wx.CallAfter(self._puzzle_saved, path, snapshot, error,
+                                                     add_recent=add_recent))
+
+    def _puzzle_saved(self, path, snapshot, error, add_recent=False):
+        """Background save finished; called on main thread."""
+
+        if not self:
+            # Window was closed in the meantime
+            return
+
+        self.puzzle.saved(snapshot, path, error)
+
+        if error is not None:
+            dlg = wx.MessageDialog(None, "Fail saved: %s" % error,
                                    "Save Error", wx.OK | wx.ICON_ERROR)
             dlg.ShowModal()
             assert dlg.Destroy()
             return
 
+        if add_recent:
+            wx.GetApp().config.addRecentFile(path)
+        wx.GetApp().indexer.refresh(path)
+
     def OnSave(self, event):
         """Save puzzle."""
 
@@ -642,65 +680,24 @@ class PuzzleWindow(BaseWindow,
     def OnUnlock(self, event):
         """Unlock puzzle."""
 
-        # This  might be able to use the speed C-based unlocker or the Python one. We could treat
-        # them the same but the C one is so much faster that it doesn't make sense to show all the
-        # dialog boxes.
+        # Even without the compiled unlocker, this only takes a moment, and
+        # less if a key that worked before for the same source does again.
 
-        if FAST_UNLOCK:
-            key = self.puzzle.break_encryption()
+        unlock_keys = wx.GetApp().unlock_keys
+        source = puzzle_source(WebSourceId(self.puzzle.path),
+                               self.puzzle.copyright)
 
-        else:
-
-            dlg = wx.MessageDialog(self,
-                                   "Depending on the speed of your computer, unlocking a"
-                                   " puzzle can take several seconds. Once unlocked, you"
-                                   " can use the check and reveal features of the puzzle."
-                                   "\n\nUnlock puzzle?",
-                                   "Unlock Puzzle?", wx.OK | wx.CANCEL)
-            result = dlg.ShowModal()
-            assert dlg.Destroy()
-
-            if result != wx.ID_OK:
-                return
-
-            dlg = wx.ProgressDialog(
-                "Unlocking",
-                "Unlocking puzzle. This may take a moment.",
-                maximum=8999,  # num of possibilities
-                parent=self,
-                style=(wx.PD_APP_MODAL | wx.PD_CAN_ABORT
-                       | wx.PD_ELAPSED_TIME | wx.PD_AUTO_HIDE))
-
-            # Key is from 1000-9999
-
-            keep_going = True
-            key = 1000
-            unlocked = False
-
-            unlock_solution = self.puzzle.pfile.unlock_solution
-
-            while keep_going and key < 10000:
-                if unlock_solution(key):
-                    unlocked = True
-                    break
-                if key % 25 == 0:
-                    # Updating dlg for every key attempt slows down loop;
-                    # Do once every 25 times and it's still nicely responsive
-                    # to canceling and updating time.
-                    (keep_going, skip) = dlg.Update(key - 1000)
-                key += 1
-
-            assert dlg.Destroy()
-
-            # busy = PBI.PyBusyInfo("Decrypting; please wait...")
-            # wx.Yield()
-
-            # del busy
+        busy = PBI.PyBusyInfo("Unlocking puzzle...")
+        wx.Yield()  # Fixes bug that doesn't show busy box on GTK.
+        key = self.puzzle.break_encryption(unlock_keys.keys(source))
+        del busy
 
         if not key:
             wx.MessageBox("Puzzle could not be unlocked.")
             return
 
+        unlock_keys.add(source, key)
+
         # Reload puzzle
         self.board.DrawNow()
 
@@ -32,6 +32,7 @@ import sleekxmpp.plugins.xep_0047
 import sleekxmpp.plugins.xep_0030
 
 from xsocius.utils import suggestSafeFilename, SKIP_UI, NAME, VERSION
+from xsocius.acrosslite import Verify
 from xsocius.gui.utils import makeHeading, makeHint, makeText
 from xsocius.gui.utils import get_sound, font_scale
 
@@ -908,6 +909,9 @@ class ShareWindowMixinBase:
             self.board.DrawNow()
             wx.CallLater(HIGHLIGHT_LENGTH, self.XMPPClearHighlight, highlights)
 
+            # Let puzzle know about changed cells
+            self.puzzle.on_any_change()
+
     def XMPPRevealCells(self, cells):
         """Reveal cells, highlight them, and sched the de-highlighting."""
 
@@ -1237,8 +1241,8 @@ class JoinWindowMixin(ShareWindowMixinBase):
     def XMPPJoined(self, orig_filename, puzzle_data):
         """Handle joining.
         
-        We've joined a puzzle and via xmpp have received the data for the puzzle. Save it to disk
-        in our crosswords directory and then open it up.
+        We've joined a puzzle and via xmpp have received the data for the puzzle. Open it up
+        straight from that data, and save it to our crosswords directory in the background.
 
         Whatever window is already open (dummy or a real puzzle), it's not the puzzle we just
         received over the wire, so let's move the .xmpp connection from the current window and
@@ -1252,11 +1256,14 @@ class JoinWindowMixin(ShareWindowMixinBase):
         directory = wx.GetApp().config.getCrosswordsDir()
         filename = suggestSafeFilename(directory, orig_filename)
         path = os.path.join(directory, filename)
-        with open(path, "wb") as f:
-            f.write(puzzle_data)
 
+        # The sharer just wrote this with fresh checksums, so there's no need to
+        # check them over again.
         logging.info("Joining new crossword")
-        new_window = wx.GetApp().open_puzzle(path)
+        new_window = wx.GetApp().open_puzzle(path, verify=Verify.Skip,
+                                             data=puzzle_data)
+        # It's added to recent files and the library once it's on disk
+        new_window._save_puzzle(add_recent=True)
         new_window.puzzle.xmpp = new_window.xmpp = self.xmpp
         new_window.friends = self.friends
         self.friends = {}
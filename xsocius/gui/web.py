@@ -1,8 +1,11 @@
 """GUI and wx-specific code for opening web puzzles."""
 
+import re
 import sys
 import datetime
 
+import os
+
 import wx
 import wx.adv
 import wx.lib.mixins.listctrl as listmix
@@ -207,6 +210,28 @@ def WebOpenGUI(idx, startat=None):
     return fname
 
 
+def WebSourceId(path):
+    """Return id of web source puzzle at path was downloaded from, or None.
+
+    WebOpener names downloads "<name> <mm-dd-yy>.puz" in our crosswords
+    directory, so that's how we recognize them. The whole name has to
+    match, as one site's name can start with another's.
+    """
+
+    config = wx.GetApp().config
+    dirname, filename = os.path.split(os.path.abspath(path))
+
+    if dirname != os.path.abspath(config.getCrosswordsDir()):
+        return None
+
+    for site in config.getWebOpeners(include_disabled=True):
+        pattern = re.escape(site['name']) + r" \d\d-\d\d-\d\d\.puz"
+        if re.fullmatch(pattern, filename):
+            return site['id']
+
+    return None
+
+
 if __name__ == "__main__":
     sys.path.append('/Users/joel/programming/xsocius')
     from xsocius.gui.config import XsociusConfig
@@ -0,0 +1,105 @@
+"""Journal of unsaved changes to a puzzle, for crash recovery.
+
+Every change to a cell is appended to a small journal file next to the
+puzzle, so if we crash (or are killed) before the puzzle is saved, the
+changes can be replayed when it's next opened. Saving the puzzle empties
+the journal.
+
+Each line is JSON. The first identifies the puzzle; the rest are changes,
+[time, x, y, response, rebus, markup], each giving the new state of a cell.
+
+GUI stuff is not located here.
+"""
+
+import json
+import time
+import logging
+
+import os
+
+
+class Journal(object):
+    """Append-only journal of changes for puzzle at puzzle_path.
+
+    ident identifies the puzzle, so a journal left over for a different
+    puzzle by the same name is ignored.
+    """
+
+    def __init__(self, puzzle_path, ident):
+        dirname, filename = os.path.split(puzzle_path)
+        self.path = os.path.join(dirname, ".%s.journal" % filename)
+        self.ident = ident
+        self.file = None
+
+    def read(self):
+        """Return list of changes in journal, oldest first.
+
+        A journal for a different puzzle is removed. If we crashed partway
+        through writing a change, it and anything after are ignored.
+        """
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        except (EnvironmentError, ValueError) as e:
+            logging.warning("Can't read journal %s: %s", self.path, e)
+            return []
+
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            header = None
+        if header != {'puzzle': self.ident}:
+            logging.info("Removing journal for other puzzle: %s", self.path)
+            self.clear()
+            return []
+
+        changes = []
+        for line in lines[1:]:
+            try:
+                changes.append(json.loads(line)[1:])
+            except ValueError:
+                break
+
+        return changes
+
+    def append(self, changes):
+        """Append changes, a list of (x, y, response, rebus, markup)."""
+
+        now = round(time.time(), 2)
+
+        try:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+                if not self.file.tell():
+                    self.file.write(json.dumps({'puzzle': self.ident}) + "\n")
+
+            self.file.write("".join(
+                json.dumps([now] + list(change)) + "\n" for change in changes))
+
+            # Get it to the OS, so it's there even if we crash; fsyncing
+            # every keystroke would cost more than it's worth.
+            self.file.flush()
+
+        except EnvironmentError as e:
+            logging.warning("Can't write journal %s: %s", self.path, e)
+
+    def close(self):
+        """Close journal file (it's reopened if needed)."""
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def clear(self):
+        """Throw away journal; puzzle was saved or changes abandoned."""
+
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except EnvironmentError as e:
+            logging.warning("Can't remove journal %s: %s", self.path, e)
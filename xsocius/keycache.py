@@ -0,0 +1,90 @@
+"""Cache of keys that unlocked puzzles before.
+
+Publishers tend to lock all of their puzzles with the same key (or one of a
+few), so keys that worked are remembered by where the puzzle came from: the
+web source it was downloaded from, or else its copyright line, with any
+years or dates blanked out. Keys that worked for a source are tried before
+searching all of them.
+
+The cache is a small JSON file, {source: [key, ...]}, most recent key first.
+
+GUI stuff is not located here.
+"""
+
+import re
+import json
+import logging
+
+import os
+
+# Most keys to remember for each source
+
+MAX_KEYS = 10
+
+
+def puzzle_source(web_id=None, copyright=""):
+    """Return name for source of puzzle, for caching its key, or None.
+
+    web_id is the id of the web source it was downloaded from, if any.
+    """
+
+    if web_id:
+        return "web:%s" % web_id
+
+    # Copyright lines usually give the year, which shouldn't matter
+    copyright = " ".join(re.sub(r"\d+", "#", copyright).split())
+    if copyright:
+        return "copyright:%s" % copyright
+
+    return None
+
+
+class KeyCache(object):
+    """Unlock keys that worked, by source, kept in file at path."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        """Return dict of source -> keys; empty if no (readable) cache."""
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (EnvironmentError, ValueError) as e:
+            logging.warning("Can't read unlock key cache %s: %s", self.path, e)
+            return {}
+
+        if not isinstance(cache, dict):
+            logging.warning("Ignoring bad unlock key cache %s", self.path)
+            return {}
+        return cache
+
+    def keys(self, source):
+        """Return keys that worked for source, most recent first."""
+
+        if source is None:
+            return []
+        return [key for key in self._read().get(source, [])
+                if isinstance(key, int) and 1000 <= key <= 9999]
+
+    def add(self, source, key):
+        """Remember that key worked for source."""
+
+        if source is None:
+            return
+
+        cache = self._read()
+        keys = [key] + [k for k in cache.get(source, []) if k != key]
+        cache[source] = keys[:MAX_KEYS]
+
+        # Write it all and move it into place, so a crash can't leave half
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except EnvironmentError as e:
+            logging.warning("Can't write unlock key cache %s: %s", self.path, e)
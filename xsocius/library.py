@@ -0,0 +1,242 @@
+"""Index of puzzles on disk.
+
+Keeps a SQLite database of the puzzles in a directory (normally our
+crosswords directory, where web downloads and shared puzzles are saved),
+so that browsing, searching, and finding puzzles to continue don't need
+to read every file.
+
+Files are only re-read when their modification time or size changes.
+Indexing is done by an Indexer thread, so it never holds up the GUI.
+
+GUI stuff is not located here.
+"""
+
+import queue
+import logging
+import sqlite3
+import threading
+
+import os
+from xsocius import acrosslite
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT,
+    author TEXT,
+    copyright TEXT,
+    width INTEGER,
+    height INTEGER,
+    locked INTEGER,
+    filled REAL,          -- fraction of white squares filled in, 0-1
+    solved INTEGER,
+    solve_time INTEGER,   -- seconds on puzzle timer
+    error TEXT            -- set if file couldn't be read as a puzzle
+)
+"""
+
+
+def puzzle_info(path):
+    """Read puzzle at path and return dict of columns for index."""
+
+    pfile = acrosslite.read(path, mapped=True, verify=acrosslite.Verify.Skip)
+
+    white = len(pfile.fill) - pfile.fill.count(".")
+    empty = pfile.fill.count("-")
+
+    if pfile.has_timer():
+        solve_time = pfile.timer().elapsed_sec
+    else:
+        solve_time = 0
+
+    return {'title': pfile.title,
+            'author': pfile.author,
+            'copyright': pfile.copyright,
+            'width': pfile.width,
+            'height': pfile.height,
+            'locked': pfile.is_solution_locked(),
+            'filled': (white - empty) / white if white else 0,
+            'solved': not empty and pfile.check_answers(pfile.fill),
+            'solve_time': solve_time,
+            'error': None}
+
+
+class PuzzleIndex(object):
+    """SQLite index of puzzles.
+
+    Like any SQLite connection, this should only be used from the thread
+    that created it.
+    """
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def close(self):
+        """Close database."""
+
+        self.db.close()
+
+    def scan(self, directory):
+        """Bring index up to date for all puzzles under directory.
+
+        Only new or changed files are read. Returns (# updated, # removed).
+        """
+
+        # Paths are kept absolute, so a puzzle is only indexed once
+        directory = os.path.abspath(directory)
+
+        known = {row['path']: (row['mtime'], row['size']) for row in
+                 self.db.execute("SELECT path, mtime, size FROM puzzles")}
+        updated = removed = 0
+
+        with self.db:
+            for dirpath, dirnames, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.lower().endswith(".puz"):
+                        continue
+
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+
+                    if known.pop(path, None) != (st.st_mtime, st.st_size):
+                        self._index(path, st)
+                        updated += 1
+
+            # Anything left in known is no longer on disk
+            for path in known:
+                if path.startswith(os.path.join(directory, "")):
+                    self.db.execute("DELETE FROM puzzles WHERE path=?", (path,))
+                    removed += 1
+
+        logging.info("Library scan of %s: %s updated, %s removed",
+                     directory, updated, removed)
+        return updated, removed
+
+    def update(self, path):
+        """Bring index up to date for single puzzle at path."""
+
+        path = os.path.abspath(path)
+
+        with self.db:
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.db.execute("DELETE FROM puzzles WHERE path=?", (path,))
+                return
+
+            row = self.db.execute("SELECT mtime, size FROM puzzles WHERE path=?",
+                                  (path,)).fetchone()
+            if row is None or tuple(row) != (st.st_mtime, st.st_size):
+                self._index(path, st)
+
+    def _index(self, path, st):
+        """Read puzzle and store in index."""
+
+        try:
+            info = puzzle_info(path)
+        except (acrosslite.PuzzleFormatError, ValueError, EnvironmentError) as e:
+            logging.warning("Library can't index %s: %s", path, e)
+            info = {'error': str(e)}
+        except Exception as e:
+            # Any other problem with the file mustn't stop indexing the rest
+            logging.exception("Library can't index %s", path)
+            info = {'error': "%s: %s" % (type(e).__name__, e)}
+
+        info.update(path=path, mtime=st.st_mtime, size=st.st_size)
+        self.db.execute(
+            "INSERT OR REPLACE INTO puzzles (%s) VALUES (%s)" % (
+                ", ".join(info), ", ".join("?" * len(info))),
+            list(info.values()))
+
+    # --- Queries
+
+    def get(self, path):
+        """Return row for puzzle at path, or None."""
+
+        return self.db.execute("SELECT * FROM puzzles WHERE path=?",
+                               (os.path.abspath(path),)).fetchone()
+
+    def all(self):
+        """Return rows for all readable puzzles, newest first."""
+
+        return self.db.execute(
+            "SELECT * FROM puzzles WHERE error IS NULL ORDER BY mtime DESC").fetchall()
+
+    def search(self, text):
+        """Return rows for puzzles with text in title, author or copyright."""
+
+        like = "%" + text.replace("%", r"\%").replace("_", r"\_") + "%"
+        return self.db.execute(
+            "SELECT * FROM puzzles WHERE error IS NULL AND"
+            " (title LIKE :s ESCAPE '\\' OR author LIKE :s ESCAPE '\\'"
+            "  OR copyright LIKE :s ESCAPE '\\')"
+            " ORDER BY mtime DESC", {'s': like}).fetchall()
+
+    def unfinished(self, limit=10):
+        """Return rows for started-but-unsolved puzzles, most recent first.
+
+        Used to continue where we left off.
+        """
+
+        return self.db.execute(
+            "SELECT * FROM puzzles WHERE error IS NULL AND NOT solved AND filled > 0"
+            " ORDER BY mtime DESC LIMIT ?", (limit,)).fetchall()
+
+
+class Indexer(threading.Thread):
+    """Background thread keeping a PuzzleIndex up to date.
+
+    Ask for work with rescan() and refresh(path); this is queued and done in
+    the background. Query the index with a separate PuzzleIndex on the
+    same database.
+    """
+
+    def __init__(self, db_path, directory):
+        super().__init__(name="Indexer", daemon=True)
+        self.db_path = db_path
+        self.directory = os.path.abspath(directory)
+        self.queue = queue.Queue()
+
+    def run(self):
+        index = PuzzleIndex(self.db_path)
+
+        while True:
+            path = self.queue.get()
+            if path is None:
+                break
+
+            try:
+                if path == self.directory:
+                    index.scan(path)
+                else:
+                    index.update(path)
+            except sqlite3.Error as e:
+                logging.error("Library indexing of %s failed: %s", path, e)
+            except Exception:
+                # Keep going, so the library doesn't stop updating
+                logging.exception("Library indexing of %s failed", path)
+
+        index.close()
+
+    def rescan(self):
+        """Queue a scan of our whole directory."""
+
+        self.queue.put(self.directory)
+
+    def refresh(self, path):
+        """Queue an update of a single puzzle."""
+
+        self.queue.put(os.path.abspath(path))
+
+    def stop(self):
+        """Finish queued work and stop."""
+
+        self.queue.put(None)
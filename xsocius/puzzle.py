@@ -4,17 +4,28 @@ Logic related to the in-memory representation of crossword puzzle, clues,
 and cells. GUI stuff is not located here.
 """
 
+import hashlib
 import logging
+import weakref
+from array import array
+from collections import namedtuple
+from itertools import compress, count
+from operator import ne
 
 import os.path
 from xsocius import acrosslite
 from xsocius.undo import UndoQueue
+from xsocius.journal import Journal
 
 
 # There is a c-based unlocker but it may not work for all systems
 # (and I have no means to compile it for Windows). Fall back on the 
 # slower Python-based one.
 
+from xsocius.unlock import gui_unlock
+
+py_gui_unlock = gui_unlock
+
 try:
     from xsocius.unlocker import gui_unlock
 
@@ -27,44 +38,193 @@ class DiagramlessPuzzleFormatError(Exception):
     """Cannot use diagramless puzzles."""
 
 
+# A step in undo queue: list of (cell, state before, state after) for cells
+# changed, and cursor (x, y, dir) before and after.
+
+UndoStep = namedtuple('UndoStep', 'cells cursor_before cursor_after')
+
+
+# Flags for a cell in GridPlanes.flags
+
+BLACK = 0x01  # space is nonplayable
+CHECKED = 0x02  # user checked correctness of cell
+REVEALED = 0x04  # user cheated and revealed cell
+CIRCLED = 0x08  # cell is circled
+PENCIL = 0x10  # answer in pencil (defaults to pen)
+
+
+# Translate file's fill to responses, and file's markup to our flags
+
+_RESPONSE_TABLE = bytes.maketrans(b'-.', b'\0\0')
+
+_MARKUP_TABLE = bytes(
+    (CHECKED if m & (acrosslite.GridMarkup.Incorrect |
+                     acrosslite.GridMarkup.PreviouslyIncorrect) else 0) |
+    (REVEALED if m & acrosslite.GridMarkup.Revealed else 0) |
+    (CIRCLED if m & acrosslite.GridMarkup.Circled else 0)
+    for m in range(256))
+
+
+# Translate our flags to file's markup, taking checked cells as incorrect
+
+_FLAGS_MARKUP_TABLE = bytes(
+    (acrosslite.GridMarkup.Incorrect if f & CHECKED else 0) |
+    (acrosslite.GridMarkup.Revealed if f & REVEALED else 0) |
+    (acrosslite.GridMarkup.Circled if f & CIRCLED else 0)
+    for f in range(256))
+
+_CHECKED_TABLE = bytes(bool(f & CHECKED) for f in range(256))
+
+# Translate file's fill to just the BLACK flag
+
+_BLACK_TABLE = bytes(BLACK if c == ord(".") else 0 for c in range(256))
+
+
+def _answer_plane(solution):
+    """Return answers plane for file's solution."""
+
+    return solution.encode('ISO-8859-1').replace(b'.', b'\0')
+
+
+def _fill_byte(response):
+    """Return byte for response in puzzle's fill buffer."""
+
+    return (response or "-").encode()[0]
+
+
+def _response_letter(response):
+    """Return response as one upper-case letter or digit, or None if it isn't.
+
+    Cells hold one Latin-1 byte, so anything else (from pasting, or from a
+    partner) can't go in one.
+    """
+
+    response = response.upper()
+    if len(response) == 1 and response.isalnum() and ord(response) < 256:
+        return response
+    return None
+
+
+def _rebus_text(rebus):
+    """Return rebus response as str, for journal.
+
+    Rebus responses read from the file (or revealed from its answers) are
+    bytes; those typed in are str.
+    """
+
+    if isinstance(rebus, bytes):
+        return rebus.decode('ISO-8859-1')
+    return rebus
+
+
+class GridPlanes(object):
+    """State of every cell in a grid, kept in flat planes.
+
+    Each plane has one item per cell, at y * width + x. Cells of the grid
+    are views onto this, so whole-grid operations can work on the planes
+    directly, and a copy of the state is just a copy of a few byte strings.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        size = width * height
+
+        self.answers = bytearray(size)  # answer, or 0 if none
+        self.responses = bytearray(size)  # current user answer, or 0 if none
+        self.flags = bytearray(size)  # BLACK, CHECKED, etc.
+        self.rebus = bytearray(size)  # for rebus square, key+1 of rebus answer
+        self.rebus_answers = {}  # key+1 -> full text of rebus solution
+        self.rebus_responses = {}  # index -> user's rebus response
+
+        # Set by puzzle: layout shared with other copies (a Design), and
+        # this puzzle's cells (by index) and clues (by number) onto it
+        self.design = None
+        self.cells = None
+        self.clues = None
+
+    def snapshot(self):
+        """Return copy of changeable state."""
+
+        return (bytes(self.responses), bytes(self.flags),
+                dict(self.rebus_responses))
+
+    def changed(self, snapshot):
+        """Return indexes of cells that differ from snapshot."""
+
+        responses, flags, rebus_responses = snapshot
+
+        out = {i for i, (a, b) in enumerate(zip(responses, self.responses)) if a != b}
+        out.update(i for i, (a, b) in enumerate(zip(flags, self.flags)) if a != b)
+        out.update(i for i in rebus_responses.keys() ^ self.rebus_responses.keys())
+        out.update(i for i, r in rebus_responses.items()
+                   if self.rebus_responses.get(i, r) != r)
+        return sorted(out)
+
+    def restore(self, snapshot, i):
+        """Set state of cell at index i from snapshot."""
+
+        responses, flags, rebus_responses = snapshot
+
+        self.responses[i] = responses[i]
+        self.flags[i] = flags[i]
+        if i in rebus_responses:
+            self.rebus_responses[i] = rebus_responses[i]
+        else:
+            self.rebus_responses.pop(i, None)
+
+
+def _flag(flag, doc):
+    """Return property for flag of cell."""
+
+    def get(cell):
+        return bool(cell.planes.flags[cell.i] & flag)
+
+    def set(cell, value):
+        if value:
+            cell.planes.flags[cell.i] |= flag
+        else:
+            cell.planes.flags[cell.i] &= 0xff ^ flag
+
+    return property(get, set, doc=doc)
+
+
 class Cell(object):
-    """Cell."""
-
-    x = None
-    y = None
-    xy = (None, None)
-    across = None  # across clue starting here, else None
-    down = None  # down clue starting here, else None
-    in_across = None  # across clue this is part of, else None
-    in_down = None  # down clue this is part of, else None
-    black = False  # True is space is nonplayable
-    answer = None  # Correct answer
-    response = None  # Current user answer on board.
-    circled = False  # Cell is circled
-    checked = False  # User checked correctness of cell
-    revealed = False  # User cheated and revealed cell
-    across_cells = []  # List of across cells in this word
-    down_cells = []  # List of down cells in this word
-    rebus_answer = None  # Full text of solution
-    rebus_response = None  # Rebus response
-    highlight = False  # Used to flash cells changed by friend
-    flash_correct = None  # Flash when correct for a second
-    pencil = False  # Answer in pencil (defaults to pen)
+    """Cell.
+
+    The state of the cell lives in a GridPlanes, shared by all cells of
+    the puzzle; this is a view onto it. Which words it's in come from the
+    puzzle's Design, shared by all copies of the puzzle. A cell made on
+    its own gets a GridPlanes of its own, and isn't in any words.
+    """
+
+    __slots__ = (
+        'planes',  # GridPlanes holding state
+        'i',  # index of this cell in planes
+        'x',
+        'y',
+        'across',  # across clue starting here, else None
+        'down',  # down clue starting here, else None
+        'highlight',  # Used to flash cells changed by friend
+        'flash_correct',  # Flash when correct for a second
+    )
 
     def __init__(self, x, y, across=None, down=None, response=None,
-                 checked=None, answer=None, revealed=None):
+                 checked=None, answer=None, revealed=None, planes=None):
+        if planes is None:
+            planes = GridPlanes(1, 1)
+            self.i = 0
+        else:
+            self.i = y * planes.width + x
+        self.planes = planes
+
         self.x = x
         self.y = y
-        self.xy = (x, y)
-        # Have to set these here, otherwise we'll use same copy of list
-        # everywhere
-        self.across_cells = []
-        self.down_cells = []
-
-        if across is not None:
-            self.across = across
-        if down is not None:
-            self.down = down
+        self.across = across
+        self.down = down
+        self.highlight = False
+        self.flash_correct = None
+
         if response is not None:
             self.response = response
         if checked is not None:
@@ -74,6 +234,103 @@ class Cell(object):
         if revealed is not None:
             self.revealed = revealed
 
+    @property
+    def xy(self):
+        """(x, y) of cell."""
+
+        design = self.planes.design
+        return design.xy[self.i] if design else (self.x, self.y)
+
+    @property
+    def in_across(self):
+        """Across clue this is part of, else None."""
+
+        design = self.planes.design
+        return self.planes.clues[design.in_across[self.i]] if design else None
+
+    @property
+    def in_down(self):
+        """Down clue this is part of, else None."""
+
+        design = self.planes.design
+        return self.planes.clues[design.in_down[self.i]] if design else None
+
+    @property
+    def across_cells(self):
+        """List of across cells in this word."""
+
+        design = self.planes.design
+        if not design:
+            return []
+        cells = self.planes.cells
+        return [cells[i] for i in design.across_words[design.in_across[self.i]]]
+
+    @property
+    def down_cells(self):
+        """List of down cells in this word."""
+
+        design = self.planes.design
+        if not design:
+            return []
+        cells = self.planes.cells
+        return [cells[i] for i in design.down_words[design.in_down[self.i]]]
+
+    @property
+    def fill_idx(self):
+        """Index of cell in puzzle's fill buffer, or -1 if black."""
+
+        return self.planes.design.fill_idx[self.i]
+
+    black = _flag(BLACK, "True is space is nonplayable")
+    checked = _flag(CHECKED, "User checked correctness of cell")
+    revealed = _flag(REVEALED, "User cheated and revealed cell")
+    circled = _flag(CIRCLED, "Cell is circled")
+    pencil = _flag(PENCIL, "Answer in pencil (defaults to pen)")
+
+    @property
+    def answer(self):
+        """Correct answer."""
+
+        b = self.planes.answers[self.i]
+        return chr(b) if b else None
+
+    @answer.setter
+    def answer(self, answer):
+        self.planes.answers[self.i] = ord(answer) if answer else 0
+
+    @property
+    def response(self):
+        """Current user answer on board."""
+
+        b = self.planes.responses[self.i]
+        if b:
+            return chr(b)
+        return None if self.black else ''
+
+    @response.setter
+    def response(self, response):
+        self.planes.responses[self.i] = ord(response) if response else 0
+
+    @property
+    def rebus_answer(self):
+        """Full text of solution, for rebus square."""
+
+        key = self.planes.rebus[self.i]
+        return self.planes.rebus_answers.get(key) if key else None
+
+    @property
+    def rebus_response(self):
+        """Rebus response."""
+
+        return self.planes.rebus_responses.get(self.i)
+
+    @rebus_response.setter
+    def rebus_response(self, rebus):
+        if rebus:
+            self.planes.rebus_responses[self.i] = rebus
+        else:
+            self.planes.rebus_responses.pop(self.i, None)
+
     def __repr__(self):
         # return "%s%s%s" % (self.x, self.y, self.response )
         return ("<Cell x={c.x} y={c.y} across={c.across} down={c.down}"
@@ -92,7 +349,8 @@ class Cell(object):
            need to track about a cell.
         """
 
-        return (self.response, self.checked, self.revealed, self.rebus_answer)
+        return (self.response, self.checked, self.revealed, self.rebus_answer,
+                self.rebus_response)
 
     def _from_state(self, state):
         """Updates cell from state item.
@@ -101,7 +359,22 @@ class Cell(object):
            from the state.
         """
 
-        self.response, self.checked, self.revealed, self.rebus_answer = state
+        # Rebus answer is there to know if cell is correct; it can't change
+        self.response, self.checked, self.revealed, _, self.rebus_response = state
+
+    def markup(self):
+        """Return acrosslite.GridMarkup flags for cell."""
+
+        m = acrosslite.GridMarkup.Default
+        if self.checked and self.is_correct():
+            m = m | acrosslite.GridMarkup.PreviouslyIncorrect
+        elif self.checked:
+            m = m | acrosslite.GridMarkup.Incorrect
+        if self.revealed:
+            m = m | acrosslite.GridMarkup.Revealed
+        if self.circled:
+            m = m | acrosslite.GridMarkup.Circled
+        return m
 
     def reset(self):
         """Start square over."""
@@ -116,22 +389,37 @@ class Cell(object):
         return (self.answer == self.response
                 and self.rebus_answer == self.rebus_response)
 
+    def _state_correct(self, state):
+        """Is cell correct when in state (from _to_state)?"""
+
+        return self.answer == state[0] and self.rebus_answer == state[4]
+
 
 class Clue(object):
     """Puzzle clue."""
 
+    __slots__ = (
+        'num',  # Clue number
+        'across',  # Across clue for this #, if any
+        'down',  # Down clue for this #, if any
+        'across_idx',  # Index # of this clue in across list
+        'down_idx',  # Index $# of this clue in down list
+        'cell',  # Cell for this clue
+        'across_filled',  # True if filled-out-across
+        'down_filled',  # True if filled-out-down
+    )
+
+    _no_cell = Cell(None, None)
+
     def __init__(self, num=None):
-        if num:
-            self.num = num
-
-    num = 0  # Clue number
-    across = None  # Across clue for this #, if any
-    down = None  # Down clue for this #, if any
-    across_idx = None  # Index # of this clue in across list
-    down_idx = None  # Index $# of this clue in down list
-    cell = Cell(None, None)  # Cell for this clue
-    across_filled = False  # True if filled-out-across
-    down_filled = False  # True if filled-out-down
+        self.num = num or 0
+        self.across = None
+        self.down = None
+        self.across_idx = None
+        self.down_idx = None
+        self.cell = self._no_cell
+        self.across_filled = False
+        self.down_filled = False
 
     def __repr__(self):
         return "<Clue num=%s across='%s' down='%s' across_idx=%s down_idx=%s" \
@@ -149,15 +437,179 @@ class Clue(object):
 
         if direction == "across":
             out = self.across_filled = all(
-                [cell.response for cell in self.cell.across_cells])
+                cell.response for cell in self.cell.across_cells)
 
         else:
             out = self.down_filled = all(
-                [cell.response for cell in self.cell.down_cells])
+                cell.response for cell in self.cell.down_cells)
 
         return out
 
 
+class Navigation(object):
+    """Tables for moving around a grid, built once for the puzzle.
+
+    For each direction (dx, dy) and index of a white cell, these give the
+    index of:
+
+      step: next white cell, skipping black ones (-1 if none)
+      limit: last white cell before a black one or the edge
+      word: start of next word; going back, of this word if not already at
+            its start, else of previous word (-1 if none)
+    """
+
+    directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+    def __init__(self, width, height, flags):
+        self.width = width
+        size = width * height
+
+        self.step = {}
+        self.limit = {}
+        self.word = {}
+
+        for dx, dy in self.directions:
+            step = self.step[dx, dy] = array('i', [-1]) * size
+            limit = self.limit[dx, dy] = array('i', [-1]) * size
+
+            if dx:
+                lines = [range(y * width, (y + 1) * width) for y in range(height)]
+            else:
+                lines = [range(x, size, width) for x in range(width)]
+
+            for line in lines:
+                if dx < 0 or dy < 0:
+                    line = line[::-1]
+
+                # Walk line backwards, remembering next white cell and end
+                # of current run of white cells
+                nxt = end = -1
+                for i in reversed(line):
+                    step[i] = nxt
+                    if flags[i] & BLACK:
+                        end = -1
+                    else:
+                        nxt = i
+                        if end == -1:
+                            end = i
+                        limit[i] = end
+
+        for dx, dy in self.directions:
+            word = self.word[dx, dy] = array('i', [-1]) * size
+            step = self.step[dx, dy]
+            limit = self.limit[dx, dy]
+            for i in range(size):
+                if flags[i] & BLACK:
+                    continue
+                if dx > 0 or dy > 0:
+                    # Start of next word is next white after end of this one
+                    word[i] = step[limit[i]]
+                elif limit[i] != i:
+                    # Going back, limit is start of this word
+                    word[i] = limit[i]
+                elif step[i] != -1:
+                    word[i] = limit[step[i]]
+
+
+class Design(object):
+    """Parts of a puzzle that don't change as it's solved.
+
+    That's the answers, black squares, rebus answers, clue text, numbering,
+    the cells of each word, and navigation tables. Get one with
+    Design.get(pfile): every puzzle open with the same content shares one,
+    so keeping lots of puzzles open costs little more than their solving
+    state (and the cells and clues viewing it).
+
+    Nothing here should be changed.
+    """
+
+    _interned = weakref.WeakValueDictionary()  # content hash -> design
+
+    def __init__(self, pfile):
+        self.width = width = pfile.width
+        self.height = height = pfile.height
+
+        self.solution = pfile.solution
+        self.clues = pfile.clues
+        self.numbering = pfile.clue_numbering()
+
+        self.answers = _answer_plane(pfile.solution)
+        self.black_flags = pfile.fill.encode('ISO-8859-1').translate(_BLACK_TABLE)
+        self.blacks = [i for i, f in enumerate(self.black_flags) if f]
+        self.nav = Navigation(width, height, self.black_flags)
+        self.xy = tuple((i % width, i // width) for i in range(width * height))
+
+        # Index of each white cell in fill buffer, which goes column by
+        # column, like the scrambled checksum
+        self.fill_idx = array('i', [-1]) * (width * height)
+        for n, i in enumerate(
+                i for x in range(width) for i in range(x, width * height, width)
+                if not self.black_flags[i]):
+            self.fill_idx[i] = n
+
+        # Cell indexes of each word, by clue number, and number of the word
+        # each cell is in (0 if none)
+        numbering = self.numbering
+        nclues = max(numbering.across_nums[-1:] + numbering.down_nums[-1:])
+        self.across_words = [()] * (nclues + 1)
+        self.down_words = [()] * (nclues + 1)
+        self.in_across = array('i', [0]) * (width * height)
+        self.in_down = array('i', [0]) * (width * height)
+
+        for num, pos, length in zip(numbering.across_nums,
+                                    numbering.across_cells,
+                                    numbering.across_lens):
+            word = self.across_words[num] = tuple(range(pos, pos + length))
+            for i in word:
+                self.in_across[i] = num
+
+        for num, pos, length in zip(numbering.down_nums,
+                                    numbering.down_cells,
+                                    numbering.down_lens):
+            word = self.down_words[num] = tuple(
+                range(pos, pos + length * width, width))
+            for i in word:
+                self.in_down[i] = num
+
+        self.rebus = bytes(width * height)
+        self.rebus_answers = {}
+        if pfile.has_rebus():
+            rebus = pfile.rebus()
+            self.rebus = bytes(rebus.table).ljust(width * height, b'\0')
+            self.rebus_answers = {k + 1: v for k, v in rebus.solutions.items()}
+
+    @staticmethod
+    def key(pfile):
+        """Return hash of the parts of pfile that go into its design."""
+
+        h = hashlib.sha1(b"%dx%d\0" % (pfile.width, pfile.height))
+        h.update(pfile.solution.encode('ISO-8859-1'))
+        h.update(pfile.fill.encode('ISO-8859-1').translate(_BLACK_TABLE))
+        h.update("\0".join(pfile.clues).encode('utf-8'))
+        for ext in (acrosslite.Extensions.Rebus,
+                    acrosslite.Extensions.RebusSolutions):
+            h.update(b"\0" + bytes(pfile.extensions.get(ext, b'')))
+        return h.hexdigest()
+
+    @classmethod
+    def get(cls, pfile):
+        """Return design for pfile, shared with any other open copy.
+
+        pfile is changed to use the shared design's solution, clues, and
+        numbering, so it doesn't hold copies of its own.
+        """
+
+        key = cls.key(pfile)
+        design = cls._interned.get(key)
+        if design is None:
+            design = cls._interned[key] = cls(pfile)
+        else:
+            pfile.solution = design.solution
+            pfile.clues = design.clues
+            pfile.helpers['clues'] = design.numbering
+        return design
+
+
 class Puzzle(object):
     """Crossword puzzle.
 
@@ -183,30 +635,66 @@ class Puzzle(object):
 
     puzzle_correct_flag = False
 
+    # Counts of cells, kept up to date as cells change
+    num_white = 0
+    num_filled = 0
+    num_correct = 0
+
     path = None
     dirname = None
     filename = None
     filename_no_ext = None
 
     dirty = False  # unsaved changes
+    save_failed = False  # last background save to our path failed
+    journal = None  # journal of unsaved changes, for crash recovery
     xmpp = None  # not connected to chat now
     timer_start = 0
     timer_start_paused = True
 
     grey_filled_clues = False
 
-    def load(self, path):
-        """Load file and setup puzzle."""
+    def load(self, path, verify=acrosslite.Verify.Eager):
+        """Load file and setup puzzle.
+
+        verify is the checksum verification policy (see acrosslite.Verify).
+        """
+
+        self._set_path(path)
+        self._load_pfile(acrosslite.read(path, verify=verify))
+
+    def load_data(self, data, path, verify=acrosslite.Verify.Eager):
+        """Setup puzzle from .puz data, to be saved to path.
+
+        data is bytes (or any bytes-like buffer) or a stream to read them
+        from, such as a puzzle received when joining a share. Nothing is
+        read from path, or written there until the puzzle is saved.
+        """
+
+        self._set_path(path)
+        if hasattr(data, 'read'):
+            pfile = acrosslite.read(data, verify=verify)
+        else:
+            pfile = acrosslite.parse(data, verify=verify)
+        self._load_pfile(pfile)
+
+    def _set_path(self, path):
+        """Note where puzzle lives on disk."""
 
         self.path = path = os.path.abspath(path)
         self.dirname, self.filename = os.path.split(path)
         self.filename_no_ext = os.path.splitext(self.filename)[0]
 
-        pfile = acrosslite.read(path)
+    def _load_pfile(self, pfile):
+        """Setup puzzle from acrosslite puzzle for our path."""
+
         if pfile.puzzletype == acrosslite.PuzzleType.Diagramless:
             raise DiagramlessPuzzleFormatError("Can't use diagramless puzzles")
         self._setup(pfile)
 
+        self.journal = Journal(self.path, "%s:%sx%s" % (
+            pfile.solution_cksum(), pfile.width, pfile.height))
+
     def _setup(self, pfile):
         """Examine board and number clues."""
 
@@ -218,123 +706,75 @@ class Puzzle(object):
         self.note = pfile.notes
         self.height = height = pfile.height
         self.width = width = pfile.width
-        self.grid = [[Cell(x, y) for y in range(height)] for x in range(width)]
 
-        raw_clues = pfile.clue_numbering()
+        # What can't change is shared with other copies of this puzzle
+        design = self.design = Design.get(pfile)
+        self.blacks = design.blacks
+        self.nav = design.nav
+        raw_clues = design.numbering
 
-        # Translate file's answers, responses, and "markup" (errors, circles, 
-        # etc) from a flat-list to our x,y matrix format.
+        # State of cells is kept in flat planes; our grid of cells is a view
+        # onto these, in our x,y matrix format.
 
-        def _to_matrix(v, h, w):
-            return {(x, y): v[x + (y * w)] for y in range(h) for x in range(w)}
+        planes = self.planes = GridPlanes(width, height)
+        planes.design = design
+        cells = planes.cells = [Cell(x, y, planes=planes) for y in range(height)
+                                for x in range(width)]
+        self.grid = [cells[x::width] for x in range(width)]
+        self.changes = {}  # cell -> state before change, until on_any_change
 
-        answers = _to_matrix(pfile.solution, height, width)
-        responses = _to_matrix(pfile.fill, height, width)
+        # Translate file's responses and "markup" (errors, circles, etc)
+        # from flat strings to our planes, which use the same layout.
+        # Answers and rebus answers are the design's, and read-only.
+
+        fill = pfile.fill.encode('ISO-8859-1')
+        planes.answers = design.answers
+        planes.responses[:] = fill.translate(_RESPONSE_TABLE)
 
         if pfile.has_markup():
-            markup = pfile.markup().markup
+            markup = bytes(pfile.markup().markup).ljust(height * width, b'\0')
         else:
-            markup = [0 for i in range(height * width)]
+            markup = bytes(height * width)
 
-        markup = _to_matrix(markup, height, width)
+        planes.flags[:] = bytes(
+            BLACK if f == ord(".") else _MARKUP_TABLE[m]
+            for f, m in zip(fill, markup))
 
+        planes.rebus = design.rebus
+        planes.rebus_answers = design.rebus_answers
         if pfile.has_rebus():
-            rebus = pfile.rebus().table
-            rebus_map = pfile.rebus().solutions
-            rebus_fill = pfile.rebus().fill
-        else:
-            rebus = [0 for i in range(height * width)]
-
-        rebus = _to_matrix(rebus, height, width)
-
-        # --- Process grid
-
-        def _translate_response(r):
-            if r == "-":
-                return ""
-            return r
-
-        for y in range(height):
-            for x in range(width):
-                cell = self.grid[x][y]
-                if responses[x, y] == ".":
-                    cell.black = True
-                    continue
-                cell.answer = answers[x, y]
-                cell.response = _translate_response(responses[x, y])
-
-                # Set states from binary coded markup in file
-                _markup = markup[x, y]
-                cell.checked = bool(
-                    _markup & acrosslite.GridMarkup.Incorrect or
-                    _markup & acrosslite.GridMarkup.PreviouslyIncorrect)
-                cell.revealed = bool(_markup & acrosslite.GridMarkup.Revealed)
-                cell.circled = bool(
-                    markup[x, y] & acrosslite.GridMarkup.Circled)
-
-                # Set rebus stuff
-                if rebus[x, y]:
-                    cell.rebus_answer = rebus_map[rebus[x, y] - 1]
-                    idx = y * width + x
-                    cell.rebus_response = rebus_fill.get(y * width + x)
-
-
+            planes.rebus_responses = {i: v for i, v in pfile.rebus().fill.items()
+                                      if planes.rebus[i]}
 
         # --- Process clues
-
-        # First, make array to hold clues. 
-        nclues = max(
-            [c['num'] for c in raw_clues.down + raw_clues.across])
-        self.clues = [None] + [Clue() for i in range(nclues)]
-
-        # Iterate over across clues
         #
-        # For each, gather clue info and then update cell info in grid
+        # Words and the cells in them are the design's; we just need clues,
+        # which keep track of whether they're filled in
 
-        for idx, aclue in enumerate(raw_clues.across):
-            num = aclue['num']
+        nclues = len(design.across_words) - 1
+        self.clues = planes.clues = [None] + [Clue() for i in range(nclues)]
 
-            # Get our clue from list and update basics.
-            clue = self.clues[aclue['num']]
-            clue.across = aclue['clue']
+        for idx, (num, pos, text) in enumerate(zip(
+                raw_clues.across_nums, raw_clues.across_cells,
+                raw_clues.across_clues)):
+            clue = self.clues[num]
+            clue.across = text
             clue.num = num
             clue.across_idx = idx
-
-            # Get cell (convert AL flat format to our matrix) and update cell
-            _pos = aclue['cell']
-            y = _pos // width
-            x = _pos % width
-            cell = self.grid[x][y]
-            clue.cell = cell
-            cell.across = clue
-
-            # Update all cells in this word
-            word = [self.grid[ox][y] for ox in range(x, x + aclue['len'])]
-            for cell in word:
-                cell.in_across = clue
-                cell.across_cells = word
-
-        # Do same thing for down clues
-
-        for idx, dclue in enumerate(raw_clues.down):
-            num = dclue['num']
-
-            clue = self.clues[dclue['num']]
-            clue.down = dclue['clue']
+            clue.cell = cells[pos]
+            clue.cell.across = clue
+
+        for idx, (num, pos, text) in enumerate(zip(
+                raw_clues.down_nums, raw_clues.down_cells,
+                raw_clues.down_clues)):
+            clue = self.clues[num]
+            clue.down = text
             clue.num = num
             clue.down_idx = idx
+            clue.cell = cells[pos]
+            clue.cell.down = clue
 
-            _pos = dclue['cell']
-            y = _pos // width
-            x = _pos % width
-            cell = self.grid[x][y]
-            clue.cell = cell
-            cell.down = clue
-
-            word = [self.grid[x][oy] for oy in range(y, y + dclue['len'])]
-            for cell in word:
-                cell.in_down = clue
-                cell.down_cells = word
+        self.count_cells()
 
         # Parse timer state
         # Format is 45,0  (seconds, is-paused)
@@ -362,14 +802,24 @@ class Puzzle(object):
         else:
             self.curr_dir = "down"
 
+        self.undo_cursor = self._cursor()
+
         # Create initial state of puzzle, so we can revert back to it.
-        # Create undo queue and put initial state into it
+        # Create undo queue.
         # Only do this if this is the start of a puzzle (not the restart
         # of a puzzle)
         if not hasattr(self, 'undo'):
-            state = self._stateToUndoPackage()
-            self.undo = UndoQueue(state)
-            self.revert_state = state
+            self.revert_state = self._stateToUndoPackage()
+            self.undo = UndoQueue()
+
+            # Get back changes we crashed before saving; these can be undone
+            # or reverted like any others. They're already in the journal.
+            if self.recover_journal():
+                self.undo.add(UndoStep(self._deltas(), self.undo_cursor,
+                                       self.undo_cursor))
+                self.changes = {}
+                self.count_cells()
+                self.dirty = True
 
         # Clear the list of clues-recently-completed
 
@@ -384,6 +834,12 @@ class Puzzle(object):
         # at a time, the entire change should be made directly, then
         # add_undo() called.
 
+        if response:
+            response = _response_letter(response)
+            if response is None:
+                return
+
+        self._touch(cell)
         cell.response = response
         cell.pencil = pencil
 
@@ -397,18 +853,36 @@ class Puzzle(object):
 
         self.add_undo()
 
-    def break_encryption(self):
-        """Break encryption of puzzle."""
+    def break_encryption(self, keys=()):
+        """Break encryption of puzzle; return key, or False if none works.
+
+        keys are tried first, in order (these are usually keys that worked
+        for other puzzles from the same source).
+        """
 
         pfile = self.pfile
-        # Now done with Cython so it's even faster :)
+        planes = self.planes
+
+        for key in keys:
+            if pfile.unlock_solution(key):
+                logging.info("Unlock: key %s worked before", key)
+                self.updateAnswers()
+                return key
+
+        # Done with Cython if we can, else with the Python unlocker
+
+        # Letters already filled in (except in pencil) rule out most keys
+        # without having to try them; if they're wrong, all keys are tried.
+        fill = bytes(0 if f & PENCIL else r
+                     for r, f in zip(planes.responses, planes.flags))
 
-        unscrambled, key = gui_unlock(
+        unscrambled, key, pruned = gui_unlock(
             self.width,
             self.height,
             pfile.solution.encode(),
-            pfile.scrambled_cksum)
-        print(unscrambled, key)
+            pfile.scrambled_cksum,
+            fill)
+        logging.info("Unlock: %s keys ruled out by filled-in letters", pruned)
         if not unscrambled:
             return False
 
@@ -425,22 +899,15 @@ class Puzzle(object):
            Called after puzzle is locked/unlocked.
         """
 
-        def _to_matrix(v, h, w):
-            return {(x, y): v[x + (y * w)]
-                    for y in range(h) for x in range(w)}
-
-        answers = _to_matrix(self.pfile.solution, self.height, self.width)
-
-        for y in range(self.height):
-            for x in range(self.width):
-                if not answers[x, y] == ".":
-                    self.grid[x][y].answer = answers[x, y]
+        # Answers plane is shared with other copies of the puzzle, so
+        # replace, don't change, it
+        self.planes.answers = _answer_plane(self.pfile.solution)
+        self.count_cells()
 
         # We can't undo/redo after locking/unlocking, so reset the undo system.
 
-        state = self._stateToUndoPackage()
-        self.undo = UndoQueue(state)
-        self.revert_state = state
+        self.undo = UndoQueue()
+        self.revert_state = self._stateToUndoPackage()
 
     # --- Undo stuff
 
@@ -463,16 +930,15 @@ class Puzzle(object):
         self.revert_state = self._stateToUndoPackage()
 
     def _stateToUndoPackage(self):
-        """Package together a simple state object for undo/redo."""
+        """Package together a simple state object for reverting."""
 
         # This should be everything that changes about the puzzle;
         # e.g.: we don't need clues as they don't change during solving.
         #
-        # To avoid complexities with deepcopy, we get just basic info about
-        # the cells in the grid
+        # This is just a copy of the changeable planes of the grid.
 
         package = {
-            'grid': [[c._to_state() for c in y] for y in self.grid],
+            'planes': self.planes.snapshot(),
             'curr_x': self.curr_cell.x,
             'curr_y': self.curr_cell.y,
             'curr_dir': self.curr_dir}
@@ -480,34 +946,60 @@ class Puzzle(object):
         return package
 
     def _undoPackageToState(self, package):
-        """Change state to reflect package from undo/redo."""
+        """Change state to reflect package from revert."""
 
-        for x in range(self.width):
-            for y in range(self.height):
-                self.grid[x][y]._from_state(package['grid'][x][y])
+        snapshot = package['planes']
+        for i in self.planes.changed(snapshot):
+            self._touch(self.grid[i % self.width][i // self.width])
+            self.planes.restore(snapshot, i)
         self.curr_cell = self.grid[package['curr_x']][package['curr_y']]
         self.curr_dir = package['curr_dir']
 
+    def _cursor(self):
+        """Return cursor position as (x, y, dir)."""
+
+        return self.curr_cell.x, self.curr_cell.y, self.curr_dir
+
+    def _apply_undo_step(self, states, cursor):
+        """Set cells to states, a list of (cell, state), and move to cursor."""
+
+        for cell, state in states:
+            self._touch(cell)
+            cell._from_state(state)
+
+        x, y, self.curr_dir = self.undo_cursor = cursor
+        self.curr_cell = self.grid[x][y]
+        self.dirty = True
+
+        self.on_any_change()
+
     def doUndo(self):
-        """Restore undo package -> current state."""
+        """Undo most recent step."""
 
-        package = self.undo.undo()
-        self._undoPackageToState(package)
+        step = self.undo.undo()
+        self._apply_undo_step([(cell, before) for cell, before, after in step.cells],
+                              step.cursor_before)
 
     def doRedo(self):
-        """Restore redo package -> curent state."""
+        """Redo most recently undone step."""
 
-        package = self.undo.redo()
-        self._undoPackageToState(package)
+        step = self.undo.redo()
+        self._apply_undo_step([(cell, after) for cell, before, after in step.cells],
+                              step.cursor_after)
 
     def add_undo(self):
-        """Add undo state.
+        """Add undo step.
         
-        Call this on any change that should be undo-able.
+        Call this on any change that should be undo-able. Everything changed
+        since the last call becomes one step, so a change to many cells (like
+        revealing a word or pasting) is undone all at once.
         """
 
-        package = self._stateToUndoPackage()
-        self.undo.add(package)
+        cursor = self._cursor()
+        deltas = self._deltas()
+        if deltas:
+            self.undo.add(UndoStep(deltas, self.undo_cursor, cursor))
+        self.undo_cursor = cursor
 
         # Free ride here; since anything that makes an undopoint also
         # means the puzzle is dirty, set this.
@@ -515,7 +1007,97 @@ class Puzzle(object):
 
         self.on_any_change()
 
-    def check_clue_fill_change(self, force=True):
+    def _touch(self, cell):
+        """Note that cell is about to change.
+
+        Anything that changes a cell's state must call this first, so that
+        on_any_change() can find out what changed.
+        """
+
+        if cell not in self.changes:
+            self.changes[cell] = cell._to_state()
+
+    def count_cells(self):
+        """Count white, filled-in and correct cells, and fill, from scratch.
+
+        After this, on_any_change keeps these up to date.
+        """
+
+        white = [cell for row in self.grid for cell in row if not cell.black]
+        self.num_white = len(white)
+        self.num_filled = sum(1 for cell in white if cell.response)
+        self.num_correct = sum(1 for cell in white if cell.is_correct())
+
+        # Responses of white cells, column by column, as bytes: the form
+        # the scrambled checksum of a locked puzzle is taken over.
+        self.fill = bytearray(_fill_byte(cell.response) for cell in white)
+
+        # Empty white cells, as bitsets: bit x of empty_rows[y] and bit y of
+        # empty_cols[x] are set if cell x,y is empty. Used to skip filled
+        # cells when moving.
+        self.empty_rows = [0] * self.height
+        self.empty_cols = [0] * self.width
+        for cell in white:
+            if not cell.response:
+                self.empty_rows[cell.y] |= 1 << cell.x
+                self.empty_cols[cell.x] |= 1 << cell.y
+
+    def _deltas(self):
+        """Return [(cell, before, after)] for cells changed since on_any_change."""
+
+        deltas = []
+        for cell, before in self.changes.items():
+            after = cell._to_state()
+            if after != before:
+                deltas.append((cell, before, after))
+        return deltas
+
+    def recover_journal(self):
+        """Replay journal of changes made but never saved.
+
+        Returns # of cells recovered.
+        """
+
+        if self.journal is None:
+            return 0
+
+        recovered = {}
+        for x, y, response, rebus, markup in self.journal.read():
+            cell = self.grid[x][y]
+            self._touch(cell)
+            cell.response = response
+            # As if read from the file
+            cell.rebus_response = rebus.encode('ISO-8859-1') if rebus else None
+            cell.checked = bool(
+                markup & acrosslite.GridMarkup.Incorrect or
+                markup & acrosslite.GridMarkup.PreviouslyIncorrect)
+            cell.revealed = bool(markup & acrosslite.GridMarkup.Revealed)
+            recovered[cell.xy] = (x, y, response, rebus, markup)
+
+        # Start journal afresh with just the end result, leaving out
+        # anything we might have been partway through writing when we died
+        self.journal.clear()
+        if recovered:
+            logging.info("Recovered %s unsaved cells from journal", len(recovered))
+            self.journal.append(list(recovered.values()))
+
+        return len(recovered)
+
+    def close(self, keep_journal=False):
+        """Done with puzzle; any unsaved changes are abandoned.
+
+        If keep_journal, they're kept in the journal instead, to be
+        recovered when the puzzle is next opened (for when saving failed).
+        """
+
+        if self.journal is None:
+            pass
+        elif keep_journal:
+            self.journal.close()
+        else:
+            self.journal.clear()
+
+    def check_clue_fill_change(self, force=True, cells=None):
         """Check for changes in clue fills.
         
         This is used to grey-out completed clues in the puzzle.
@@ -529,9 +1111,21 @@ class Puzzle(object):
         If force is selected, all clues are added to the
         queue--this is used when the puzzle is opened, or
         if we change our preferences around greying-out clues.
+
+        If cells is given, only the clues these cells are in are
+        checked; on a change, that's usually just two.
         """
 
-        for c in self.clues[1:]:
+        if cells is None:
+            clues = self.clues[1:]
+        else:
+            clues = {}
+            for cell in cells:
+                for clue in (cell.in_across, cell.in_down):
+                    if clue is not None:
+                        clues[clue] = True
+
+        for c in clues:
             if c.across:
                 old = c.across_filled
                 filled = c.update_filled("across")
@@ -555,6 +1149,25 @@ class Puzzle(object):
         call here directly.
         """
 
+        deltas = self._deltas()
+        self.changes = {}
+
+        for cell, before, after in deltas:
+            if after[0] != before[0]:
+                self.fill[cell.fill_idx] = _fill_byte(after[0])
+            if bool(after[0]) != bool(before[0]):
+                self.empty_rows[cell.y] ^= 1 << cell.x
+                self.empty_cols[cell.x] ^= 1 << cell.y
+            self.num_filled += bool(after[0]) - bool(before[0])
+            self.num_correct += (cell._state_correct(after) -
+                                 cell._state_correct(before))
+
+        if deltas and self.journal is not None:
+            self.journal.append([
+                (c.x, c.y, c.response or "", _rebus_text(c.rebus_response),
+                 c.markup())
+                for c, before, after in deltas])
+
         # Since we just made a change, let's see if the puzzle
         # is correct -- if so, set a flag that the GUI will notice
         # during an idle period so it can notify the user
@@ -565,7 +1178,9 @@ class Puzzle(object):
         # Update clues-filled
 
         if self.grey_filled_clues:
-            self.check_clue_fill_change()
+            self.check_clue_fill_change(force=False, cells=[
+                cell for cell, before, after in deltas
+                if bool(before[0]) != bool(after[0])])
 
         # Do anything GUI needs here
         if hasattr(self, 'gui'):
@@ -581,80 +1196,69 @@ class Puzzle(object):
         original Cell.
         """
 
-        x = cell.x
-        y = cell.y
-
-        x = x + dx
-        while dx and x >= 0 and x < self.width:
-            black = self.grid[x][y].black
-            if not black and (not skip_filled or not self.grid[x][y].response):
-                break
-            if black and stay_in_word:
-                x = cell.x
-                break
-            x = x + dx
-        else:
-            x = cell.x  # Can't move; only black beyond us
+        i = cell.i
+
+        # One step, as on every arrow key and letter typed, is just a lookup
+        if not skip_filled:
+            step = self.nav.step.get((dx, dy))
+            if step is not None:
+                j = step[i]
+                if j == -1 or stay_in_word and j != i + dx + dy * self.width:
+                    return cell
+                return self.planes.cells[j]
+
+        if dx:
+            i = self._move(i, (dx, 0), cell.x, self.empty_rows[cell.y],
+                           stay_in_word, skip_filled)
+        if dy:
+            i = self._move(i, (0, dy), i // self.width,
+                           self.empty_cols[i % self.width],
+                           stay_in_word, skip_filled)
+        return self.cell_at(i)
+
+    def _move(self, i, direction, pos, empty, stay_in_word, skip_filled):
+        """Move from index i (at pos in its row/col) one step in direction.
+
+        empty is bitset of empty cells in row/col, for skip_filled.
+        """
 
-        y = y + dy
-        while dy and y >= 0 and y < self.height:
-            black = self.grid[x][y].black
-            if not black and (not skip_filled or not self.grid[x][y].response):
-                break
-            if black and stay_in_word:
-                y = cell.y
-                break
-            y = y + dy
+        nav = self.nav
+        delta = direction[0] + direction[1] * self.width
+
+        if not skip_filled:
+            j = nav.step[direction][i]
+            if j == -1 or stay_in_word and j != i + delta:
+                return i
+            return j
+
+        # Find nearest empty cell in that direction
+        if delta > 0:
+            bits = empty >> (pos + 1)
+            if not bits:
+                return i
+            j = i + delta * (bits & -bits).bit_length()
         else:
-            y = cell.y  # Can't move; only black beyond us
+            bits = empty & ((1 << pos) - 1)
+            if not bits:
+                return i
+            j = i + delta * (pos - bits.bit_length() + 1)
 
-        return self.grid[x][y]
+        if stay_in_word:
+            limit = nav.limit[direction][i]
+            if (j - limit) * delta > 0:
+                return i
+        return j
 
     def next_word(self, cell, dx, dy):
         """Skip to next word in same direction."""
 
-        x = cell.x
-        y = cell.y
-
-        if dx < 0 and not cell == cell.across_cells[0]:
-            # Not at start of word, move there
-            x = cell.across_cells[0].x
-
-        elif dx:
-            while x >= 0 and x < self.width and not self.grid[x][y].black:
-                x += dx
-            if x == self.width or x < 0:
-                x = cell.x
-            else:
-                # Found black cell
-                while x >= 0 and x < self.width and self.grid[x][y].black:
-                    x += dx
-                if x == self.width or x < 0:
-                    x = cell.x
-                else:
-                    # Found next/prev word, move to first letter
-                    x = self.grid[x][y].across_cells[0].x
-
-        if dy < 0 and not cell == cell.down_cells[0]:
-            # Not at start of word, move there
-            y = cell.down_cells[0].y
-
-        elif dy:
-            while y >= 0 and y < self.height and not self.grid[x][y].black:
-                y += dy
-            if y == self.height or y < 0:
-                y = cell.y
-            else:
-                # Found black cell
-                while y >= 0 and y < self.height and self.grid[x][y].black:
-                    y += dy
-                if y == self.height or y < 0:
-                    y = cell.y
-                else:
-                    # Found next/prev word, move to first letter
-                    y = self.grid[x][y].down_cells[0].y
-
-        return self.grid[x][y]
+        i = cell.i
+        for direction in ((dx, 0), (0, dy)):
+            if direction != (0, 0):
+                j = self.nav.word[direction][i]
+                if j != -1:
+                    i = j
+        return self.cell_at(i)
 
     def switch_dir(self):
         """Switch our direction on puzzle."""
@@ -700,29 +1304,14 @@ class Puzzle(object):
         """Return True if entire puzzle is filled out and correct."""
 
         if self.pfile.is_solution_locked():
-            # If puzzle is locked, we can use the underlying acrosslite lib
-            # to check if it is correct--but we first have to "push" our
-            # changes to the grid responses down into the format that the
-            # library uses, and then use that for comparison.
-            fill = ""
-            for y in range(self.height):
-                for x in range(self.width):
-                    cell = self.grid[x][y]
-
-                    if cell.black:
-                        fill += "."
-                    elif not cell.response:
-                        fill += "-"
-                    else:
-                        fill += cell.response
-            return self.pfile.check_answers(fill)
+            # If puzzle is locked, all we can do is compare the scrambled
+            # checksum of our fill with the puzzle's--and it can't be right
+            # until everything is filled in.
+            return (self.num_filled == self.num_white and
+                    acrosslite.data_cksum(self.fill) == self.pfile.scrambled_cksum)
 
         else:
-            for row in self.grid:
-                for cell in row:
-                    if not cell.is_correct():
-                        return False
-            return True
+            return self.num_correct == self.num_white
 
     # ---- Clear and Paste
 
@@ -731,8 +1320,9 @@ class Puzzle(object):
         """Clear current word."""
 
         for letter in self.curr_word():
+            self._touch(letter)
             letter.response = None
-            letter.rebus = None
+            letter.rebus_response = None
 
         self.add_undo()
 
@@ -745,6 +1335,10 @@ class Puzzle(object):
            Used when pasting from clipboard.
         """
 
+        # Leave out anything that can't go in a cell
+        letters = [_response_letter(letter) for letter in word]
+        word = [letter for letter in letters if letter]
+
         curr_word = self.curr_word()
         for i, letter in enumerate(word):
 
@@ -752,6 +1346,7 @@ class Puzzle(object):
                 # Reached end of word on board, stop trying to paste in rest
                 break
 
+            self._touch(curr_word[i])
             curr_word[i].response = letter
             if self.xmpp is not None:
                 self.xmpp.send_set(curr_word[i].x, curr_word[i].y, letter)
@@ -770,6 +1365,7 @@ class Puzzle(object):
             return
 
         if not cell.is_correct():
+            self._touch(cell)
             cell.checked = True
             return True
 
@@ -810,6 +1406,40 @@ class Puzzle(object):
             self.add_undo()
             return True
 
+    def cell_at(self, i):
+        """Return cell at index i of grid planes."""
+
+        return self.planes.cells[i]
+
+    def _mismatched_cells(self, filled_only=False):
+        """Return cells whose response isn't their answer.
+
+        This compares the answer and response planes in one pass, so is
+        much faster than asking every cell. Rebus text isn't compared.
+        """
+
+        planes = self.planes
+        indexes = compress(count(), map(ne, planes.answers, planes.responses))
+        if filled_only:
+            indexes = filter(planes.responses.__getitem__, indexes)
+        return [self.cell_at(i) for i in indexes]
+
+    def _incorrect_cells(self):
+        """Return filled-in cells that aren't correct."""
+
+        cells = self._mismatched_cells(filled_only=True)
+
+        # Rebus squares can have the right letter but the wrong full text
+        planes = self.planes
+        rebus = set(compress(count(), planes.rebus))
+        rebus.update(planes.rebus_responses)
+        for cell in map(self.cell_at, sorted(rebus)):
+            if (cell.response and cell.response == cell.answer
+                    and not cell.is_correct()):
+                cells.append(cell)
+
+        return cells
+
     def check_puzzle(self, noecho=False):
         """Check entire puzzle.
         
@@ -818,10 +1448,10 @@ class Puzzle(object):
         """
 
         changed = False
-        for x in self.grid:
-            for y in x:
-                if self._check_letter(y):
-                    changed = True
+        for cell in self._incorrect_cells():
+            self._touch(cell)
+            cell.checked = True
+            changed = True
         if changed:
             if self.xmpp is not None and not noecho:
                 # Send our friend a request to do same, but only if we were
@@ -839,12 +1469,25 @@ class Puzzle(object):
         # Use internally; doesn't send updates via XMPP or add undopoint.
 
         if cell.response != cell.answer:
+            self._touch(cell)
             cell.response = cell.answer
             cell.rebus_response = cell.rebus_answer
             cell.checked = True
             cell.revealed = True
             return True
 
+    def clear_puzzle(self):
+        """Start entire puzzle over.
+
+        Doesn't add an undopoint; call add_undo() after.
+        """
+
+        for row in self.grid:
+            for cell in row:
+                if not cell.black:
+                    self._touch(cell)
+                    cell.reset()
+
     def reveal_letter(self):
         """Reveal letter under cursor."""
 
@@ -871,10 +1514,9 @@ class Puzzle(object):
         """Reveal entire puzzle."""
 
         changed = False
-        for x in self.grid:
-            for y in x:
-                if self._reveal_letter(y):
-                    changed = True
+        for cell in self._mismatched_cells():
+            if self._reveal_letter(cell):
+                changed = True
         if changed:
             if self.xmpp is not None and not noecho:
                 self.xmpp.send_reveal([("*", "*")])
@@ -884,12 +1526,11 @@ class Puzzle(object):
     def reveal_incorrect(self):
         """Reveal entire puzzle, but only for incorrect letters"""
 
-        changed = False
-        for x in self.grid:
-            for y in x:
-                if y.response and self._reveal_letter(y):
-                    changed = True
+        changed = [cell for cell in self._mismatched_cells(filled_only=True)
+                   if self._reveal_letter(cell)]
         if changed:
+            if self.xmpp is not None:
+                self.xmpp.send_reveal([c.xy for c in changed])
             self.add_undo()
             return True
 
@@ -898,48 +1539,39 @@ class Puzzle(object):
     def update_pfile(self):
         """Update underlying pfile for save."""
 
-        # Write state changes back to pfile and use underlying save
-
-        fill = ""
-        mkup = []
-        rebus = self.pfile.rebus()
-
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[x][y]
-
-                # Fill = repsponse
-                if cell.black:
-                    fill += "."
-                elif not cell.response:
-                    fill += "-"
-                else:
-                    fill += cell.response
-
-                if cell.rebus_response:
-                    rebus.fill[y * self.width + x] = cell.rebus_response
-
-                # Markup
-                m = acrosslite.GridMarkup.Default
-                if cell.checked and cell.is_correct():
-                    m = m | acrosslite.GridMarkup.PreviouslyIncorrect
-                elif cell.checked:
-                    m = m | acrosslite.GridMarkup.Incorrect
-                if cell.revealed:
-                    m = m | acrosslite.GridMarkup.Revealed
-                if cell.circled:
-                    m = m | acrosslite.GridMarkup.Circled
-                mkup.append(m)
-
-        self.pfile.fill = fill
-        self.pfile.markup().markup = mkup
+        # Write state changes back to pfile and use underlying save.
+        # The planes are already laid out like the file, so this is done
+        # on them as a whole.
+
+        planes = self.planes
+
+        fill = planes.responses.replace(b'\0', b'-')
+        for i in self.blacks:
+            fill[i] = ord(".")
+
+        # Checked cells are marked incorrect, unless now correct
+        mkup = planes.flags.translate(_FLAGS_MARKUP_TABLE)
+        for i in compress(count(), planes.flags.translate(_CHECKED_TABLE)):
+            if self.cell_at(i).is_correct():
+                mkup[i] ^= (acrosslite.GridMarkup.Incorrect |
+                            acrosslite.GridMarkup.PreviouslyIncorrect)
+
+        self.pfile.fill = fill.decode('ISO-8859-1')
+        self.pfile.markup().markup = bytes(mkup)
+        self.pfile.rebus().fill.update(sorted(planes.rebus_responses.items()))
 
         # Save timer
         self.pfile.extensions[acrosslite.Extensions.Timer] = "%s,%s" % (
             self.timer_time, int(not self.timer_running))
 
-    def save_puzzle(self, path=None):
-        """Save puzzle."""
+    def save_puzzle(self, path=None, worker=None, done=None):
+        """Save puzzle.
+
+        If worker (a saver.SaveWorker) is given, a snapshot of the puzzle is
+        written in the background; done(snapshot, error) is called from the
+        worker thread when it's finished, and should get saved() called
+        back on our thread.
+        """
 
         # Save the puzzle state so we can revert-to-saved
 
@@ -950,11 +1582,41 @@ class Puzzle(object):
         if not path:
             path = self.path
 
-        self.pfile.save(path)
+        if worker is None:
+            self.pfile.save(path)
+            logging.info("Puzzle saved: %s", path)
+            if path == self.path and self.journal is not None:
+                self.journal.clear()
+        else:
+            def finished(snapshot, error):
+                # Called on worker thread, so this is known before saved()
+                # is called back, and as soon as the worker is flushed
+                if path == self.path:
+                    self.save_failed = error is not None
+                if done is not None:
+                    done(snapshot, error)
+
+            worker.save(self.pfile.snapshot(), path, finished)
 
-        logging.info("Puzzle saved: %s", path)
         self.dirty = False
 
+    def saved(self, snapshot, path, error):
+        """Background save of snapshot to path has finished."""
+
+        if error is not None:
+            # Our changes aren't on disk after all
+            self.dirty = True
+            return
+
+        # Remember how the file is laid out now, so the next save can patch it
+        self.pfile.layout = snapshot.layout
+        logging.info("Puzzle saved: %s", path)
+
+        # Journal isn't needed once everything in it is on disk
+        if (path == self.path and not self.dirty and not self.save_failed
+                and self.journal is not None):
+            self.journal.clear()
+
 
 if __name__ == "__main__":
     p = Puzzle()
@@ -0,0 +1,91 @@
+"""Background saving of puzzles.
+
+Serializing a puzzle and writing it to disk (which might be a slow network
+home directory) shouldn't hold up solving, so saves are handed to a
+SaveWorker thread as snapshots of the puzzle (see acrosslite.Puzzle.snapshot)
+which can't change underneath it.
+
+GUI stuff is not located here.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+
+class SaveWorker(threading.Thread):
+    """Thread that saves puzzle snapshots in the background.
+
+    Call save() to queue a snapshot. If a save to the same path is already
+    waiting, it's replaced, so a burst of saves becomes one write of the
+    newest snapshot. Saves are written in order, one at a time.
+    """
+
+    def __init__(self):
+        super().__init__(name="SaveWorker", daemon=True)
+        self.cond = threading.Condition()
+        self.pending = OrderedDict()  # path -> (snapshot, [callbacks])
+        self.busy = False
+        self.stopping = False
+
+        # Layout of each file as we last wrote it, for patching in place
+        self.layouts = {}
+
+    def save(self, snapshot, path, done=None):
+        """Queue snapshot to be saved to path.
+
+        done(snapshot, error) is called from this thread once it's written,
+        with the exception if saving failed or else None.
+        """
+
+        with self.cond:
+            old_snapshot, callbacks = self.pending.pop(path, (None, []))
+            if done is not None:
+                callbacks.append(done)
+            self.pending[path] = (snapshot, callbacks)
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                if not self.pending:
+                    # Stopping, and nothing left to do
+                    break
+                path, (snapshot, callbacks) = self.pending.popitem(last=False)
+                self.busy = True
+
+            error = None
+            try:
+                # Our last write is newer than anything the snapshot knows of
+                if path in self.layouts:
+                    snapshot.layout = self.layouts[path]
+                snapshot.save(path)
+                self.layouts[path] = snapshot.layout
+            except Exception as e:
+                logging.error("Background save of %s failed: %s", path, e)
+                self.layouts.pop(path, None)
+                error = e
+
+            for done in callbacks:
+                done(snapshot, error)
+
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+    def flush(self):
+        """Wait until everything queued has been saved."""
+
+        with self.cond:
+            while self.pending or self.busy:
+                self.cond.wait()
+
+    def stop(self):
+        """Save anything queued, then stop thread."""
+
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+        self.join()
@@ -4,49 +4,54 @@ from collections import deque
 
 
 class UndoQueue(object):
-    """Queue for holding undo/redo states.
+    """Queue for holding undo/redo steps.
 
-       Create with UndoQueue(initial_state, # of undo steps possible).
+       Create with UndoQueue(# of undo steps possible); by default, this is
+       unlimited.
 
-       After each state change, call add(state).
+       A step describes a single change (the queue doesn't care how), and
+       should hold only what changed, as before and after values, so that
+       it can be undone and redone. Keeping only the change makes a step
+       cheap, so there's no need to limit history.
+
+       After each change, call add(step).
        Undo is possible if can_undo().
        Redo is possible if can_redo().
 
-       Undo returns new (previous) state.
-       Redo returns new (previous from future) state.
+       Undo returns the step to undo (apply its before values).
+       Redo returns the step to redo (apply its after values).
 
        Note that adding clears potential redos, as they are now invalid.
-
-       The current state of the system is always at the end of _undo.
     """
 
-    def __init__(self, state, max_steps=9):
-        self._undo = deque([state], max_steps + 1)
-        self._redo = deque()
+    def __init__(self, max_steps=None):
+        self._undo = deque(maxlen=max_steps)
+        self._redo = []
 
-    def add(self, state):
-        """Add current state to undo q."""
+    def add(self, step):
+        """Add step to undo q."""
 
-        self._undo.append(state)
+        self._undo.append(step)
         self._redo.clear()
 
     def undo(self):
-        """Return previous state (& append current state to redo q)."""
+        """Return step to undo (& append it to redo q)."""
 
-        self._redo.append(self._undo.pop())
-        return self._undo[-1]
+        step = self._undo.pop()
+        self._redo.append(step)
+        return step
 
     def redo(self):
-        """Redo previously-undone state (& append current state to undo q)."""
+        """Return previously-undone step to redo (& append it to undo q)."""
 
-        item = self._redo.pop()
-        self._undo.append(item)
-        return item
+        step = self._redo.pop()
+        self._undo.append(step)
+        return step
 
     def can_undo(self):
         """Undo is possible?"""
 
-        return len(self._undo) > 1
+        return bool(self._undo)
 
     def can_redo(self):
         """Redo is possible?"""
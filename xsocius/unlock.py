@@ -0,0 +1,267 @@
+"""Pure-Python unlocker, for when the compiled one isn't available.
+
+A locked puzzle's solution is scrambled with a 4-digit key, and only the
+checksum of the real solution is kept, so unlocking means trying all 9000
+keys. Doing that with acrosslite.unscramble_solution redoes all of the
+string shuffling for each key, and takes many seconds.
+
+Instead, this works out how each key moves and shifts the letters:
+
+- Unscrambling is four rounds, one per digit of the key (last first). Each
+  unshuffles, cuts the deck at the digit, and unshifts every letter by the
+  key digit for its position mod 4. The unshuffle and cut only depend on
+  the digit and the number of letters, so they're precomputed as one index
+  table per digit.
+
+- Chaining the tables for the first three digits gives where each final
+  letter comes from, and how much it's shifted in total; keys that share
+  those digits share the work. The letters for each key are then one
+  gather, with the shift done for all letters at once as bytes packed into
+  one big integer.
+
+- Checksums are found for a block of keys at a time, the same way: column
+  by column over the unscrambled letters, with each key's checksum in its
+  own lane of one big integer.
+
+- If some letters are already known (filled in), each key is first checked
+  against a few of them, following just those letters back through the
+  rounds; most keys are thrown out this way without unscrambling anything.
+
+It gives the same result as the compiled unlocker (see unlocker.pyx).
+
+GUI stuff is not located here.
+"""
+
+from operator import itemgetter
+
+# Keys are tried from 9999 down, as people often use keys >7000, in blocks
+# of this many; we stop after the first block with a match.
+
+BLOCK = 1000
+
+# Most known letters to check a key against before unscrambling with it;
+# each wrong key gets past one with a 1 in 26 chance.
+
+SAMPLES = 4
+
+# Only these are ever scrambled
+
+_LETTERS = bytes(range(ord("A"), ord("Z") + 1))
+
+
+def _getter(index):
+    """Return function to gather the items of a sequence at index, as tuple."""
+
+    if len(index) == 1:
+        i = index[0]
+        return lambda seq: (seq[i],)
+    if not index:
+        return lambda seq: ()
+    return itemgetter(*index)
+
+
+def _tables(n):
+    """Return index table for each key digit, for n letters.
+
+    Round with digit d turns letters s into [s[i] for i in table[d]],
+    before unshifting. This is unshuffle (s[1::2] + s[::2]), then cut
+    (s[n - d:] + s[:n - d], with Python's slicing when d is bigger than n).
+    """
+
+    unshuffled = list(range(1, n, 2)) + list(range(0, n, 2))
+    tables = []
+    for d in range(10):
+        start = n - d
+        if start < 0:
+            start += n
+        if start < 0 or start == n:
+            start = 0
+        tables.append(unshuffled[start:] + unshuffled[:start])
+    return tables
+
+
+def _lanes(data):
+    """Return bytes data as int, one byte per lane."""
+
+    return int.from_bytes(data, 'little')
+
+
+def _checksums(words, n):
+    """Return checksum of each of words, each n bytes long, together."""
+
+    k = len(words)
+    data = b"".join(words)
+
+    # Each key has a 32-bit lane: 16 for checksum, and room for carry
+    ones = int.from_bytes(b"\1\0\0\0" * k, 'little')
+    low15 = ones * 0x7fff
+    low16 = ones * 0xffff
+
+    column = bytearray(4 * k)
+    cksums = 0
+    for i in range(n):
+        column[0::4] = data[i::n]
+
+        # right-shift one with wrap-around, then add in the data and clear
+        # any carried bit past 16
+        cksums = ((((cksums >> 1) & low15) | ((cksums & ones) << 15)) +
+                  int.from_bytes(column, 'little')) & low16
+
+    out = cksums.to_bytes(4 * k, 'little')
+    return [out[j] | out[j + 1] << 8 for j in range(0, 4 * k, 4)]
+
+
+def _fits(letters, key, spots, tables):
+    """Would unscrambling letters with key give the known letter at spots?
+
+    spots is a list of (index, letter). Each is followed back through the
+    rounds, last first, to the scrambled letter it comes from, adding up
+    its unshifts on the way.
+    """
+
+    digits = (key // 1000, key // 100 % 10, key // 10 % 10, key % 10)
+
+    for i, want in spots:
+        shift = 0
+        for d in digits:
+            shift += digits[i % 4]
+            i = tables[d][i]
+        if (letters[i] - 65 - shift) % 26 + 65 != want:
+            return False
+
+    return True
+
+
+def unscramble_keys(letters, keys):
+    """Return letters (bytes, A-Z) unscrambled with each of keys.
+
+    This is acrosslite.unscramble_string, for many keys at once; keys
+    sharing all but the last digit share most of the work.
+    """
+
+    n = len(letters)
+    tables = _tables(n)
+    positions = bytes(i % 4 for i in range(n))
+
+    # Value for every lane, and top bit of every lane
+    ones = _lanes(b"\1" * n)
+    high = ones * 0x80
+
+    # Letters after first round's unshuffle and cut, by last digit
+    first = [bytes(_getter(table)(letters)) for table in tables]
+
+    heads = {}
+    for key in keys:
+        heads.setdefault(key // 10, []).append(key % 10)
+
+    words = {}
+    for head, lasts in heads.items():
+        digits = [head // 100, head // 10 % 10, head % 10]
+
+        # Chain tables of later rounds back from the end: chain[i] is where
+        # letter i of the result is, after the first round
+        chain = tables[digits[0]]
+        chains = [chain]
+        for d in digits[1:]:
+            chain = _getter(chain)(tables[d])
+            chains.append(chain)
+        gather = _getter(chain)
+
+        # Each round, letter at i is shifted by the key digit for i % 4;
+        # find the total shift, except for the last digit's share, and how
+        # many times the last digit is used, for each letter.
+        classes = [positions] + [bytes(_getter(c)(positions)) for c in chains]
+        table = bytes.maketrans(b"\0\1\2\3", bytes(digits + [0]))
+        threes = bytes.maketrans(b"\0\1\2\3", b"\0\0\0\1")
+        shift = sum(_lanes(c.translate(table)) for c in classes)
+        times = sum(_lanes(c.translate(threes)) for c in classes)
+
+        for last in lasts:
+            # Letter is A-Z; less 65 and shift of 0-36, plus 52 to keep
+            # lanes from going negative, leaves 16-77. Take 26 off twice for
+            # lanes that are 26 or more, and add 65 back.
+            x = (_lanes(bytes(gather(first[last]))) - 13 * ones -
+                 shift - last * times)
+            x -= 26 * (((x + 102 * ones) & high) >> 7)
+            x -= 26 * (((x + 102 * ones) & high) >> 7)
+            words[head * 10 + last] = (x + 65 * ones).to_bytes(n, 'little')
+
+    return [words[key] for key in keys]
+
+
+def _search(letters, scrambled_cksum, spots):
+    """Return (key, letters unscrambled with it, # keys pruned) for best key.
+
+    Keys that don't fit spots are pruned; the count is of those above the
+    key found. If no key works, returns (1000, None, # keys pruned).
+    """
+
+    n = len(letters)
+    tables = _tables(n)
+    pruned = 0
+
+    for top in range(9999, 999, -BLOCK):
+        keys = list(range(top, max(top - BLOCK, 999), -1))
+        if spots:
+            keys_left = [key for key in keys
+                         if _fits(letters, key, spots, tables)]
+        else:
+            keys_left = keys
+        words = unscramble_keys(letters, keys_left)
+
+        for i, (key, word, cksum) in enumerate(
+                zip(keys_left, words, _checksums(words, n))):
+            if cksum == scrambled_cksum:
+                return (key, word, pruned + (top - key) - i)
+
+        pruned += len(keys) - len(keys_left)
+
+    return (1000, None, pruned)
+
+
+def gui_unlock(width, height, solution, scrambled_cksum, fill=None):
+    """Find key for locked solution; return (solution, key, # keys pruned).
+
+    fill, if given, is laid out like solution, with a letter for each
+    square known to be right (anything else is unknown). Keys which don't
+    give those letters are pruned without unscrambling. If the fill turns
+    out to be wrong and nothing is found, all keys are tried without it.
+
+    If no key works, returns (False, 1000, # keys pruned). Same arguments
+    and result as the compiled unlocker: solution is bytes, as is the
+    result.
+    """
+
+    if len(solution) != width * height:
+        raise ValueError("Solution isn't %sx%s" % (width, height))
+    if fill is not None and len(fill) != width * height:
+        raise ValueError("Fill isn't %sx%s" % (width, height))
+
+    # Letters of solution, column by column, without black squares
+    columns = b"".join(solution[x::width] for x in range(width))
+    letters = columns.replace(b".", b"")
+
+    if letters.translate(None, _LETTERS):
+        # Only letters are ever scrambled, so no key can work
+        return (False, 1000, 0)
+
+    spots = []
+    if fill is not None:
+        # Known letters, by their place in letters; sample them evenly
+        known = b"".join(fill[x::width] for x in range(width))
+        known = bytes(f for c, f in zip(columns, known) if c != ord("."))
+        sample = [(i, c) for i, c in enumerate(known) if c in _LETTERS]
+        k = min(len(sample), SAMPLES)
+        spots = [sample[i * len(sample) // k] for i in range(k)]
+
+    key, word, pruned = _search(letters, scrambled_cksum, spots)
+    if word is None and spots:
+        key, word, _ = _search(letters, scrambled_cksum, [])
+    if word is None:
+        return (False, 1000, pruned)
+
+    # Put letters back in black square layout, row by row
+    word = iter(word)
+    columns = bytes(c if c == ord(".") else next(word) for c in columns)
+    rows = [columns[y::height] for y in range(height)]
+    return (b"".join(rows), key, pruned)
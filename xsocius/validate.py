@@ -0,0 +1,103 @@
+"""Validate a directory tree of puzzles.
+
+This is headless (it doesn't need wx), so it can be run from a console or
+cron job against an archive of downloaded puzzles:
+
+    python -m xsocius.validate ~/Crosswords
+
+Puzzles are read and have their checksums verified across a pool of
+worker processes. One line of JSON is written to stdout for each file, as
+results come in, and a summary is written to stderr at the end.
+"""
+
+import sys
+import json
+import argparse
+import multiprocessing
+from collections import Counter
+
+import os
+from xsocius import acrosslite
+
+# Statuses for a file
+
+OK = "ok"
+CHECKSUM = "checksum"  # read fine, but checksums don't match
+FORMAT = "format"  # not a valid puzzle
+UNREADABLE = "unreadable"  # couldn't open or read file
+
+
+def find_puzzles(top):
+    """Yield path of every .puz file under directory top."""
+
+    for dirpath, dirnames, filenames in os.walk(top):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".puz"):
+                yield os.path.join(dirpath, filename)
+
+
+def validate(path):
+    """Read and verify puzzle at path; return dict of results."""
+
+    result = {"path": path}
+
+    try:
+        puz = acrosslite.read(path, mapped=True, verify=acrosslite.Verify.Lazy)
+        problems = puz.verify()
+
+    except EnvironmentError as e:
+        result["status"] = UNREADABLE
+        result["error"] = str(e)
+
+    except (acrosslite.PuzzleFormatError, ValueError) as e:
+        # Bad header, or text that can't be decoded
+        result["status"] = FORMAT
+        result["error"] = str(e)
+
+    except Exception as e:
+        # Anything else wrong with the file mustn't stop the whole run
+        result["status"] = FORMAT
+        result["error"] = "%s: %s" % (type(e).__name__, e)
+
+    else:
+        result["status"] = CHECKSUM if problems else OK
+        result["locked"] = puz.is_solution_locked()
+        if problems:
+            result["problems"] = problems
+
+    return result
+
+
+def main(argv=None):
+    """Validate puzzles; returns exit code (1 if any aren't ok)."""
+
+    parser = argparse.ArgumentParser(
+        description="Validate all puzzles in a directory tree.")
+    parser.add_argument("directories", metavar="directory", nargs="+",
+                        help="Directories to search for .puz files")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of worker processes (defaults to # of CPUs)")
+    args = parser.parse_args(argv)
+
+    paths = (path for top in args.directories for path in find_puzzles(top))
+    statuses = Counter()
+    locked = 0
+
+    with multiprocessing.Pool(args.jobs) as pool:
+        for result in pool.imap_unordered(validate, paths, chunksize=16):
+            statuses[result["status"]] += 1
+            locked += bool(result.get("locked"))
+            print(json.dumps(result), flush=True)
+
+    total = sum(statuses.values())
+    sys.stderr.write(
+        "{} puzzles: {} ok, {} checksum mismatch, {} format error, {} unreadable"
+        " ({} locked)\n".format(total, statuses[OK], statuses[CHECKSUM],
+                                statuses[FORMAT], statuses[UNREADABLE], locked))
+
+    return 0 if statuses[OK] == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())